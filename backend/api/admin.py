@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import WasteType, WasteRecord
+from django.db import transaction
+from .models import WasteType, WasteRecord, WasteRecordPrediction
+from .serializers import WasteRecordListSerializer
+from . import caching, events, rollups, type_cache
 
 
 @admin.register(WasteType)
@@ -7,6 +10,14 @@ class WasteTypeAdmin(admin.ModelAdmin):
     list_display = ("id", "label", "display_name", "color")
     search_fields = ("label", "display_name")
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        type_cache.clear()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        type_cache.clear()
+
 
 @admin.register(WasteRecord)
 class WasteRecordAdmin(admin.ModelAdmin):
@@ -27,6 +38,44 @@ class WasteRecordAdmin(admin.ModelAdmin):
 
     image_preview.short_description = "Image Preview"
 
+    # Admin writes go through the same rollup, cache and live-event updates
+    # as the API
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        previous = WasteRecord.objects.get(pk=obj.pk) if change else None
+        super().save_model(request, obj, form, change)
+        if change:
+            rollups.update_records([previous], [obj])
+        else:
+            rollups.add_records([obj])
+            events.record_created(
+                obj, WasteRecordListSerializer(obj, context={"request": request}).data
+            )
+        caching.invalidate_on_commit()
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        events.record_deleted(obj)
+        super().delete_model(request, obj)
+        rollups.remove_records([obj])
+        caching.invalidate_on_commit()
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        records = list(queryset.select_related("type"))
+        for record in records:
+            events.record_deleted(record)
+        super().delete_queryset(request, queryset)
+        rollups.remove_records(records)
+        caching.invalidate_on_commit()
+
+
+@admin.register(WasteRecordPrediction)
+class WasteRecordPredictionAdmin(admin.ModelAdmin):
+    list_display = ("id", "record", "model_version", "type", "confidence")
+    list_filter = ("model_version", "type")
+    raw_id_fields = ("record",)
+
 
 # Needed for the image preview in admin
 from django.utils.safestring import mark_safe
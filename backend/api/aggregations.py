@@ -0,0 +1,52 @@
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from .models import WasteType
+
+
+def summarize_by_type():
+    """
+    Count and average confidence for every waste type in a single grouped query.
+
+    Totals are read from the daily rollups, so the cost depends on the number
+    of days with data rather than the number of records. Types with no records
+    are still returned with zero counts.
+
+    Returns a tuple of (total_items, rows) where each row is a dict with
+    id, label, name, color, count, percentage, confidence and confidence_sum.
+    """
+    waste_types = WasteType.objects.annotate(
+        record_count=Coalesce(Sum("daily_rollups__count"), 0),
+        confidence_sum=Coalesce(Sum("daily_rollups__confidence_sum"), 0.0),
+    ).values("id", "label", "display_name", "color", "record_count", "confidence_sum")
+
+    waste_types = list(waste_types)
+    total_items = sum(row["record_count"] for row in waste_types)
+
+    return total_items, [
+        build_summary_row(
+            row["id"],
+            row["label"],
+            row["display_name"],
+            row["color"],
+            row["record_count"],
+            row["confidence_sum"],
+            total_items,
+        )
+        for row in waste_types
+    ]
+
+
+def build_summary_row(type_id, label, name, color, count, confidence_sum, total_items):
+    percentage = round((count / total_items) * 100) if total_items > 0 else 0
+    avg_confidence = confidence_sum / count if count else 0
+    return {
+        "id": type_id,
+        "label": label,
+        "name": name,
+        "color": color,
+        "count": count,
+        "percentage": percentage,
+        "confidence": round(avg_confidence or 0),
+        "confidence_sum": confidence_sum,
+    }
@@ -0,0 +1,124 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+GENERATION_KEY = "analytics:generation"
+
+
+def get_cache():
+    return caches[getattr(settings, "ANALYTICS_CACHE", "default")]
+
+
+def get_timeout():
+    return getattr(settings, "ANALYTICS_CACHE_TIMEOUT", 60)
+
+
+class CacheStats:
+    """Thread-safe per-endpoint hit/miss/304 counters for monitoring."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "not_modified": 0}
+        )
+
+    def increment(self, endpoint, counter):
+        with self._lock:
+            self._counters[endpoint][counter] += 1
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {name: dict(counts) for name, counts in self._counters.items()}
+        totals = {"hits": 0, "misses": 0, "not_modified": 0}
+        for counts in endpoints.values():
+            for counter, value in counts.items():
+                totals[counter] += value
+        return {"endpoints": endpoints, "totals": totals}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+stats = CacheStats()
+
+
+def current_generation(cache):
+    """Token that changes whenever records are created or deleted."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = time.time_ns()
+        cache.add(GENERATION_KEY, generation, None)
+        generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate():
+    """Retire every cached analytics response."""
+    get_cache().set(GENERATION_KEY, time.time_ns(), None)
+
+
+def invalidate_on_commit():
+    transaction.on_commit(invalidate)
+
+
+def make_key(endpoint, request, generation):
+    params = sorted(request.query_params.lists())
+    digest = hashlib.md5(
+        json.dumps([request.get_host(), params]).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"analytics:{generation}:{endpoint}:{digest}"
+
+
+def make_etag(data):
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return quote_etag(hashlib.md5(body.encode(), usedforsecurity=False).hexdigest())
+
+
+def cache_analytics(view):
+    """
+    Cache a GET analytics view's response data until records change.
+
+    Entries are keyed by endpoint, host and query parameters under the current
+    generation token, so invalidate() drops all of them at once. Responses
+    carry an ETag and a matching If-None-Match gets a 304. Entries also
+    expire after ANALYTICS_CACHE_TIMEOUT seconds so "last N days" windows
+    roll over even when nothing is inserted.
+    """
+    endpoint = view.__name__
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        cache = get_cache()
+        key = make_key(endpoint, request, current_generation(cache))
+        entry = cache.get(key)
+        if entry is None:
+            stats.increment(endpoint, "misses")
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = (response.data, make_etag(response.data))
+            cache.set(key, entry, get_timeout())
+        else:
+            stats.increment(endpoint, "hits")
+
+        data, etag = entry
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or if_none_match == ["*"]:
+            stats.increment(endpoint, "not_modified")
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+
+    return wrapper
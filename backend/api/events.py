@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+
+from django.db import transaction
+
+
+class Subscription:
+    """
+    One subscriber's bounded event queue, bound to its event loop.
+
+    When the queue is full the oldest event is dropped, so a slow client
+    never blocks publishers or other subscribers.
+    """
+
+    def __init__(self, loop, max_queue):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventBroker:
+    """
+    In-process pub/sub fan-out for live dashboard events.
+
+    publish() is thread-safe and may be called from sync views; each event is
+    handed to every subscriber's loop with call_soon_threadsafe. Events carry
+    a sequence number so clients can tell when they missed one (a dropped
+    event or a reconnect) and need to refetch. Events only
+    reach clients connected to the same process, so run a single ASGI worker
+    (or put a shared channel layer in front) when using the live stream.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscriptions = set()
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Create a subscription on the running event loop."""
+        subscription = Subscription(asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event, data):
+        with self._lock:
+            self._sequence += 1
+            message = {"id": self._sequence, "event": event, "data": data}
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # The subscriber's loop has been closed
+                self.unsubscribe(subscription)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+
+broker = EventBroker()
+
+
+def format_sse(message):
+    """Encode a published message as a Server-Sent Events frame."""
+    return (
+        f"id: {message['id']}\nevent: {message['event']}\n"
+        f"data: {json.dumps(message['data'])}\n\n"
+    )
+
+
+def publish_on_commit(event, data):
+    """Publish once the current transaction commits, so clients never see rolled-back rows."""
+    transaction.on_commit(lambda: broker.publish(event, data))
+
+
+def record_created(record, representation):
+    publish_on_commit("record", representation)
+    publish_on_commit(
+        "stats",
+        {
+            "type_id": record.type_id,
+            "label": record.type.label,
+            "count": 1,
+            "confidence_sum": record.confidence,
+        },
+    )
+
+
+def record_deleted(record):
+    publish_on_commit(
+        "record-deleted",
+        {
+            "id": record.id,
+            "type_id": record.type_id,
+            "type": record.type.label,
+            "timestamp": record.timestamp.isoformat(),
+        },
+    )
+    publish_on_commit(
+        "stats",
+        {
+            "type_id": record.type_id,
+            "label": record.type.label,
+            "count": -1,
+            "confidence_sum": -record.confidence,
+        },
+    )
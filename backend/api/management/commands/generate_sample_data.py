@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from api.models import WasteType, WasteRecord
+from api import caching, rollups
 from django.utils import timezone
 import random
 from datetime import timedelta
@@ -65,6 +66,9 @@ class Command(BaseCommand):
             )
 
             record.save()
+            rollups.add_records([record])
+
+        caching.invalidate()
 
         self.stdout.write(
             self.style.SUCCESS(f"Successfully generated {count} sample waste records")
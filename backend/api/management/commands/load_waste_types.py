@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from api.models import WasteType
+from api import type_cache
 
 
 class Command(BaseCommand):
@@ -22,4 +23,6 @@ class Command(BaseCommand):
                 },
             )
 
+        type_cache.clear()
+
         self.stdout.write(self.style.SUCCESS("Successfully loaded initial waste types"))
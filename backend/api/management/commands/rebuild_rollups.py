@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from api import caching, rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild hourly and daily waste rollups from raw waste records"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start", help="First local date to rebuild (YYYY-MM-DD), default all"
+        )
+        parser.add_argument(
+            "--end", help="Last local date to rebuild (YYYY-MM-DD), default all"
+        )
+
+    def handle(self, *args, **kwargs):
+        start_date = self.parse_date_option(kwargs["start"], "--start")
+        end_date = self.parse_date_option(kwargs["end"], "--end")
+
+        hourly, daily = rollups.rebuild(start_date=start_date, end_date=end_date)
+        caching.invalidate()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully rebuilt {hourly} hourly and {daily} daily rollups"
+            )
+        )
+
+    def parse_date_option(self, value, name):
+        if value is None:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f"{name} must be a date in YYYY-MM-DD format")
+        return parsed
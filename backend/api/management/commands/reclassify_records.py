@@ -0,0 +1,74 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from api import reclassify
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-classify stored waste record images with a model and save the"
+        " predictions. Needs onnxruntime for .onnx models or torch for"
+        " TorchScript models; neither is in requirements.txt, so install the"
+        " one matching your model (pip install onnxruntime / pip install torch)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "model", help="Exported model file (.onnx or TorchScript .pt)"
+        )
+        parser.add_argument(
+            "--model-version",
+            help="Tag stored with each prediction, default file name plus content hash",
+        )
+        parser.add_argument("--chunk-size", type=int, default=256)
+        parser.add_argument("--batch-size", type=int, default=32)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--threads", type=int, help="Inference threads")
+        parser.add_argument(
+            "--limit", type=int, help="Stop after this many records in this run"
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Delete this version's predictions instead of resuming",
+        )
+
+    def handle(self, *args, **kwargs):
+        model_path = kwargs["model"]
+        if not os.path.isfile(model_path):
+            raise CommandError(f"Model file not found: {model_path}")
+        if kwargs["limit"] is not None and kwargs["limit"] <= 0:
+            raise CommandError("--limit must be a positive number")
+        model_version = kwargs["model_version"] or reclassify.model_version_for(
+            model_path
+        )
+
+        try:
+            classifier = reclassify.load_classifier(model_path, kwargs["threads"])
+            reclassifier = reclassify.Reclassifier(
+                classifier,
+                model_version,
+                batch_size=kwargs["batch_size"],
+                workers=kwargs["workers"],
+            )
+        except (ImportError, ValueError) as e:
+            raise CommandError(str(e))
+
+        def progress(classified, skipped, last_id):
+            self.stdout.write(
+                f"{classified} classified, {skipped} skipped (last record id {last_id})"
+            )
+
+        classified, skipped = reclassifier.run(
+            chunk_size=kwargs["chunk_size"],
+            limit=kwargs["limit"],
+            restart=kwargs["restart"],
+            progress=progress,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully classified {classified} records with {model_version}"
+                f" ({skipped} unreadable images skipped)"
+            )
+        )
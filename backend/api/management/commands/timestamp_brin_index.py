@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+INDEX_NAME = "wasterecord_timestamp_brin"
+
+
+class Command(BaseCommand):
+    help = (
+        "Create (or with --drop remove) a BRIN index on WasteRecord.timestamp."
+        " PostgreSQL only. BRIN suits append-only timestamps: tiny and cheap"
+        " to maintain, but only useful for range scans, so it complements the"
+        " btree indexes on large tables. Safe to run at any time; the index is"
+        " built concurrently without locking out writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--drop", action="store_true", help="Drop the index instead"
+        )
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor != "postgresql":
+            raise CommandError("BRIN indexes are only supported on PostgreSQL")
+
+        # CONCURRENTLY cannot run inside a transaction; management commands
+        # run in autocommit mode
+        with connection.cursor() as cursor:
+            if kwargs["drop"]:
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+                message = f"Dropped index {INDEX_NAME}"
+            else:
+                cursor.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+                    "ON api_wasterecord USING brin (timestamp)"
+                )
+                message = f"Created index {INDEX_NAME}"
+
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,76 @@
+# Generated by Django 5.2 on 2026-10-18 09:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WasteDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("confidence_sum", models.FloatField(default=0)),
+                ("confidence_min", models.FloatField()),
+                ("confidence_max", models.FloatField()),
+                ("bucket", models.DateField()),
+                (
+                    "type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="api.wastetype",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["bucket"],
+                "unique_together": {("type", "bucket")},
+            },
+        ),
+        migrations.CreateModel(
+            name="WasteHourlyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("confidence_sum", models.FloatField(default=0)),
+                ("confidence_min", models.FloatField()),
+                ("confidence_max", models.FloatField()),
+                ("bucket", models.DateTimeField()),
+                (
+                    "type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hourly_rollups",
+                        to="api.wastetype",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["bucket"],
+                "unique_together": {("type", "bucket")},
+            },
+        ),
+    ]
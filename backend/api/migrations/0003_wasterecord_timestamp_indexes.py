@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="wasterecord",
+            index=models.Index(fields=["timestamp"], name="wasterecord_timestamp_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wasterecord",
+            index=models.Index(
+                fields=["type", "timestamp"], name="wasterecord_type_ts_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_wasterecord_timestamp_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wasterecord",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, null=True, unique=True
+            ),
+        ),
+    ]
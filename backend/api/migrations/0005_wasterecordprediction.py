@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-18 09:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_wasterecord_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WasteRecordPrediction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model_version", models.CharField(max_length=100)),
+                ("confidence", models.FloatField()),
+                ("probabilities", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "record",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="predictions",
+                        to="api.wasterecord",
+                    ),
+                ),
+                (
+                    "type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="predictions",
+                        to="api.wastetype",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["record_id"],
+                "unique_together": {("model_version", "record")},
+            },
+        ),
+    ]
@@ -20,6 +20,10 @@ class WasteRecord(models.Model):
     confidence = models.FloatField()  # Store as float for better precision
     timestamp = models.DateTimeField(auto_now_add=True)
     image = models.ImageField(upload_to="waste_images/")
+    # Client-generated key so retried uploads from a bin are not duplicated
+    idempotency_key = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False
+    )
 
     def __str__(self):
         return (
@@ -28,3 +32,69 @@ class WasteRecord(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]  # Newest first
+        indexes = [
+            models.Index(fields=["timestamp"], name="wasterecord_timestamp_idx"),
+            models.Index(fields=["type", "timestamp"], name="wasterecord_type_ts_idx"),
+        ]
+
+
+class WasteRollup(models.Model):
+    """Pre-aggregated WasteRecord totals for one waste type and time bucket."""
+
+    count = models.PositiveIntegerField(default=0)
+    confidence_sum = models.FloatField(default=0)
+    confidence_min = models.FloatField()
+    confidence_max = models.FloatField()
+
+    class Meta:
+        abstract = True
+
+
+class WasteHourlyRollup(WasteRollup):
+    type = models.ForeignKey(
+        WasteType, on_delete=models.CASCADE, related_name="hourly_rollups"
+    )
+    bucket = models.DateTimeField()  # Start of the hour
+
+    def __str__(self):
+        return f"{self.type.display_name} - {self.bucket:%Y-%m-%d %H:00}"
+
+    class Meta:
+        ordering = ["bucket"]
+        unique_together = [("type", "bucket")]
+
+
+class WasteDailyRollup(WasteRollup):
+    type = models.ForeignKey(
+        WasteType, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    bucket = models.DateField()  # Local date in settings.TIME_ZONE
+
+    def __str__(self):
+        return f"{self.type.display_name} - {self.bucket:%Y-%m-%d}"
+
+    class Meta:
+        ordering = ["bucket"]
+        unique_together = [("type", "bucket")]
+
+
+class WasteRecordPrediction(models.Model):
+    """A stored record's image re-classified by a specific model version."""
+
+    record = models.ForeignKey(
+        WasteRecord, on_delete=models.CASCADE, related_name="predictions"
+    )
+    model_version = models.CharField(max_length=100)
+    type = models.ForeignKey(
+        WasteType, on_delete=models.CASCADE, related_name="predictions"
+    )
+    confidence = models.FloatField()  # Percentage, like WasteRecord.confidence
+    probabilities = models.JSONField()  # {label: probability} for every class
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.record_id} - {self.model_version}: {self.type.display_name}"
+
+    class Meta:
+        ordering = ["record_id"]
+        unique_together = [("model_version", "record")]
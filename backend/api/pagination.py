@@ -1,5 +1,21 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def parse_page_size(value, cutoff):
+    """Parse a strictly positive page size capped at `cutoff`; raises ValueError."""
+    size = int(value)
+    if size <= 0:
+        raise ValueError(f"Page size must be positive, got {size}")
+    return min(size, cutoff)
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -18,3 +34,144 @@ class CustomPageNumberPagination(PageNumberPagination):
                 "current_page": self.page.number,
             }
         )
+
+
+def estimate_count(queryset):
+    """
+    Planner row estimate for a queryset on PostgreSQL.
+
+    Other backends have no cheap estimate, so they fall back to COUNT(*).
+    """
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.count()
+    plan = json.loads(queryset.explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class TimestampCursorPagination(BasePagination):
+    """
+    Keyset pagination over (timestamp, id), newest first.
+
+    Each page is fetched with a `WHERE (timestamp, id) < cursor` filter instead
+    of OFFSET, so deep pages cost the same as the first one and rows inserted
+    while paging never shift or duplicate results. No COUNT(*) is issued
+    unless `count=exact` (or `count=approximate` for a planner estimate on
+    PostgreSQL) is requested.
+    """
+
+    page_size = 20
+    page_size_query_param = "limit"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request)
+
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            timestamp, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk)
+                )
+
+        ordering = ("timestamp", "id") if reverse else ("-timestamp", "-id")
+        results = list(queryset.order_by(*ordering)[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Whether there is anything beyond this page in each direction
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return parse_page_size(
+                request.query_params[self.page_size_query_param], self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if not mode:
+            return None
+        if mode == "exact":
+            return queryset.count()
+        if mode == "approximate":
+            return estimate_count(queryset)
+        raise ValidationError(
+            {self.count_query_param: "Must be 'exact' or 'approximate'."}
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            direction, timestamp, pk = (
+                urlsafe_b64decode(encoded.encode("ascii")).decode("ascii").split("|")
+            )
+            timestamp = parse_datetime(timestamp)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None or direction not in ("n", "p"):
+            raise NotFound(self.invalid_cursor_message)
+        return (timestamp, pk), direction == "p"
+
+    def encode_cursor(self, record, direction):
+        token = f"{direction}|{record.timestamp.isoformat()}|{record.pk}"
+        encoded = urlsafe_b64encode(token.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], "n")
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], "p")
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "results": data,
+                "count": self.count,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "results": schema,
+                "count": {"type": "integer", "nullable": True},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+            },
+        }
@@ -0,0 +1,218 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from PIL import Image
+
+from .models import WasteRecord, WasteRecordPrediction
+from . import type_cache
+
+# Output order of the MobileNetV3 classifier (ImageFolder sorts class folders)
+CLASS_LABELS = ("glass", "metal", "paper", "plastic")
+IMG_SIZE = 224
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class OnnxClassifier:
+    """ONNX export of the model (src/export.py), run with onnxruntime."""
+
+    def __init__(self, path, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        return softmax(self.session.run(None, {self.input_name: batch})[0])
+
+
+class TorchScriptClassifier:
+    """TorchScript export of the model (fp32 or int8)."""
+
+    def __init__(self, path, threads=None):
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.model = torch.jit.load(path, map_location="cpu").eval()
+
+    def predict(self, batch):
+        with self.torch.inference_mode():
+            logits = self.model(self.torch.from_numpy(batch))
+            return self.torch.softmax(logits, dim=1).numpy()
+
+
+def load_classifier(path, threads=None):
+    if path.endswith(".onnx"):
+        return OnnxClassifier(path, threads)
+    if path.endswith((".pt", ".ts")):
+        return TorchScriptClassifier(path, threads)
+    raise ValueError(f"Unsupported model file {path}: expected .onnx or .pt")
+
+
+def model_version_for(path):
+    """Default version tag: file name plus a content hash, so retrained weights get a new tag."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return f"{name}-{digest.hexdigest()[:12]}"
+
+
+def load_image(name):
+    """Decode a stored image resized to the model input as uint8 HWC, or None if unreadable."""
+    try:
+        with default_storage.open(name) as f, Image.open(f) as image:
+            return np.asarray(
+                image.convert("RGB").resize((IMG_SIZE, IMG_SIZE), Image.BILINEAR)
+            )
+    except (OSError, ValueError):
+        return None
+
+
+def normalize(images):
+    batch = np.stack(images).astype(np.float32) / 255.0
+    batch = (batch - IMAGENET_MEAN) / IMAGENET_STD
+    return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+
+def last_classified_id(model_version):
+    """Resume checkpoint: chunks are saved atomically in id order."""
+    return (
+        WasteRecordPrediction.objects.filter(model_version=model_version).aggregate(
+            last=Max("record_id")
+        )["last"]
+        or 0
+    )
+
+
+def iter_record_chunks(after_id, chunk_size):
+    """Yield lists of (id, image name) in id order using keyset pagination."""
+    queryset = WasteRecord.objects.exclude(image="").order_by("id")
+    while True:
+        chunk = list(
+            queryset.filter(id__gt=after_id).values_list("id", "image")[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        after_id = chunk[-1][0]
+
+
+class Reclassifier:
+    """
+    Re-score stored WasteRecord images with a model and store the results
+    as WasteRecordPrediction rows tagged with model_version.
+
+    Records are streamed in id-ordered chunks; only the current chunk and
+    the next one (being decoded by the worker pool) are held in memory.
+    Each chunk's predictions are upserted in one transaction, so the
+    highest stored record id is a valid checkpoint to resume from.
+    """
+
+    def __init__(self, classifier, model_version, batch_size=32, workers=4):
+        self.classifier = classifier
+        self.model_version = model_version
+        self.batch_size = batch_size
+        self.workers = workers
+
+        types_by_label = {
+            waste_type.label: waste_type
+            for waste_type in type_cache.get_waste_types().values()
+        }
+        missing = [label for label in CLASS_LABELS if label not in types_by_label]
+        if missing:
+            raise ValueError(f"Missing waste types: {', '.join(missing)}")
+        self.type_ids = [types_by_label[label].id for label in CLASS_LABELS]
+
+    def run(self, chunk_size=256, limit=None, restart=False, progress=None):
+        """Return (classified, skipped) counts for this run."""
+        if restart:
+            WasteRecordPrediction.objects.filter(
+                model_version=self.model_version
+            ).delete()
+        after_id = last_classified_id(self.model_version)
+        if limit:
+            chunk_size = min(chunk_size, limit)
+
+        classified = skipped = 0
+        chunks = iter_record_chunks(after_id, chunk_size)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def decode(chunk):
+                if chunk is None:
+                    return None
+                return chunk, executor.map(load_image, [name for _, name in chunk])
+
+            pending = decode(next(chunks, None))
+            while pending is not None:
+                chunk, images = pending
+                images = list(images)
+                remaining = None if limit is None else limit - classified - skipped
+                if remaining is not None and remaining <= len(chunk):
+                    chunk, images = chunk[:remaining], images[:remaining]
+                    pending = None
+                    if not chunk:
+                        break
+                else:
+                    # Decode the next chunk while this one runs through the model
+                    pending = decode(next(chunks, None))
+
+                record_ids = [
+                    record_id
+                    for (record_id, _), image in zip(chunk, images)
+                    if image is not None
+                ]
+                images = [image for image in images if image is not None]
+                skipped += len(chunk) - len(images)
+
+                probabilities = [
+                    self.classifier.predict(normalize(images[i : i + self.batch_size]))
+                    for i in range(0, len(images), self.batch_size)
+                ]
+                if probabilities:
+                    self.save(record_ids, np.concatenate(probabilities))
+                classified += len(record_ids)
+
+                if progress:
+                    progress(classified, skipped, chunk[-1][0])
+
+        return classified, skipped
+
+    def save(self, record_ids, probabilities):
+        predictions = [
+            WasteRecordPrediction(
+                record_id=record_id,
+                model_version=self.model_version,
+                type_id=self.type_ids[int(probs.argmax())],
+                confidence=float(probs.max()) * 100,
+                probabilities={
+                    label: float(p) for label, p in zip(CLASS_LABELS, probs)
+                },
+            )
+            for record_id, probs in zip(record_ids, probabilities)
+        ]
+        with transaction.atomic():
+            WasteRecordPrediction.objects.bulk_create(
+                predictions,
+                update_conflicts=True,
+                unique_fields=["model_version", "record"],
+                update_fields=["type", "confidence", "probabilities"],
+            )
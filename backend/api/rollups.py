@@ -0,0 +1,172 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Greatest, Least, Trunc
+from django.utils import timezone
+
+from .models import WasteRecord, WasteHourlyRollup, WasteDailyRollup
+from .timeseries import local_midnight
+
+
+def hour_bucket(timestamp):
+    """Start of the local hour containing `timestamp`."""
+    return timezone.localtime(timestamp).replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(timestamp):
+    """Local date (settings.TIME_ZONE) containing `timestamp`."""
+    return timezone.localdate(timestamp)
+
+
+ROLLUPS = [
+    # (model, bucket of a single timestamp, Trunc kind, bucket stored as a date)
+    (WasteHourlyRollup, hour_bucket, "hour", False),
+    (WasteDailyRollup, day_bucket, "day", True),
+]
+
+
+def group_records(records, bucket_func):
+    """Reduce records to {(type_id, bucket): [count, sum, min, max]}."""
+    groups = defaultdict(lambda: [0, 0.0, None, None])
+    for record in records:
+        group = groups[(record.type_id, bucket_func(record.timestamp))]
+        group[0] += 1
+        group[1] += record.confidence
+        group[2] = (
+            record.confidence if group[2] is None else min(group[2], record.confidence)
+        )
+        group[3] = (
+            record.confidence if group[3] is None else max(group[3], record.confidence)
+        )
+    return groups
+
+
+def apply_delta(model, type_id, bucket, count, total, low, high):
+    """Merge a group of new records into one rollup row, creating it if needed."""
+    rows = model.objects.filter(type_id=type_id, bucket=bucket)
+    changes = {
+        "count": F("count") + count,
+        "confidence_sum": F("confidence_sum") + total,
+        "confidence_min": Least("confidence_min", Value(low)),
+        "confidence_max": Greatest("confidence_max", Value(high)),
+    }
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(
+                type_id=type_id,
+                bucket=bucket,
+                count=count,
+                confidence_sum=total,
+                confidence_min=low,
+                confidence_max=high,
+            )
+    except IntegrityError:
+        # Another writer created the row between our update and insert
+        rows.update(**changes)
+
+
+@transaction.atomic
+def add_records(records):
+    """Fold newly inserted records into the hourly and daily rollups."""
+    for model, bucket_func, _, _ in ROLLUPS:
+        for (type_id, bucket), delta in group_records(records, bucket_func).items():
+            apply_delta(model, type_id, bucket, *delta)
+
+
+@transaction.atomic
+def remove_records(records):
+    """
+    Recompute the rollup buckets touched by records that have been deleted.
+
+    Min/max cannot be decremented, so the affected days are rebuilt from the
+    remaining raw records.
+    """
+    records = list(records)
+    if not records:
+        return
+    rebuild(
+        start_date=min(day_bucket(record.timestamp) for record in records),
+        end_date=max(day_bucket(record.timestamp) for record in records),
+        type_ids={record.type_id for record in records},
+    )
+
+
+@transaction.atomic
+def update_records(previous, records):
+    """
+    Bring the rollups in line with records that were edited in place.
+
+    `previous` holds the records as they were before the edit. The old
+    buckets drop the old values and the new buckets pick up the new ones;
+    both are rebuilt from the raw records, which already hold the edit.
+    """
+    remove_records(list(previous) + list(records))
+
+
+def grouped_rows(kind, start=None, end=None, type_ids=None):
+    """Aggregate raw records into (type, bucket) groups with one query."""
+    records = WasteRecord.objects.all()
+    if start is not None:
+        records = records.filter(timestamp__gte=start)
+    if end is not None:
+        records = records.filter(timestamp__lt=end)
+    if type_ids is not None:
+        records = records.filter(type_id__in=type_ids)
+    return (
+        records.annotate(bucket=Trunc("timestamp", kind))
+        .values("type_id", "bucket")
+        .annotate(
+            count=Count("id"),
+            confidence_sum=Sum("confidence"),
+            confidence_min=Min("confidence"),
+            confidence_max=Max("confidence"),
+        )
+        .order_by()
+    )
+
+
+@transaction.atomic
+def rebuild(start_date=None, end_date=None, type_ids=None, batch_size=1000):
+    """
+    Recompute hourly and daily rollups from raw records.
+
+    start_date/end_date are inclusive local dates limiting the rebuild to a
+    window; without them every rollup row is rebuilt. Returns the number of
+    (hourly, daily) rows written.
+    """
+    tz = timezone.get_default_timezone()
+    start = local_midnight(start_date, tz) if start_date else None
+    end = local_midnight(end_date + timedelta(days=1), tz) if end_date else None
+
+    written = []
+    for model, _, kind, is_date in ROLLUPS:
+        stale = model.objects.all()
+        if start is not None:
+            stale = stale.filter(bucket__gte=start_date if is_date else start)
+        if end is not None:
+            stale = stale.filter(
+                bucket__lt=end_date + timedelta(days=1) if is_date else end
+            )
+        if type_ids is not None:
+            stale = stale.filter(type_id__in=type_ids)
+        stale.delete()
+
+        rows = [
+            model(
+                type_id=row["type_id"],
+                bucket=timezone.localdate(row["bucket"]) if is_date else row["bucket"],
+                count=row["count"],
+                confidence_sum=row["confidence_sum"],
+                confidence_min=row["confidence_min"],
+                confidence_max=row["confidence_max"],
+            )
+            for row in grouped_rows(kind, start, end, type_ids)
+        ]
+        model.objects.bulk_create(rows, batch_size=batch_size)
+        written.append(len(rows))
+
+    return tuple(written)
@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import WasteType, WasteRecord
+from . import caching, events, rollups, type_cache
 
 
 class WasteTypeSerializer(serializers.ModelSerializer):
@@ -27,15 +29,100 @@ class WasteRecordSerializer(serializers.ModelSerializer):
         return None
 
 
+class WasteRecordListSerializer(serializers.BaseSerializer):
+    """
+    Read-only fast path producing the same output as WasteRecordSerializer.
+
+    Builds each row directly instead of running the per-field ModelSerializer
+    machinery, and resolves the absolute media URL prefix once per response.
+    Expects records fetched with `select_related("type")`.
+    """
+
+    # Fields the list representation reads, for use with QuerySet.only()
+    query_fields = ["id", "type__id", "type__label", "confidence", "timestamp", "image"]
+    timestamp_field = serializers.DateTimeField()
+
+    def to_representation(self, obj):
+        return {
+            "id": obj.id,
+            "type_id": obj.type_id,
+            "type": obj.type.label,
+            "confidence": obj.confidence,
+            "timestamp": self.timestamp_field.to_representation(obj.timestamp),
+            "image": self.get_image(obj),
+        }
+
+    def get_image(self, obj):
+        if not obj.image:
+            return None
+        url = obj.image.url
+        request = self.context.get("request")
+        if not request:
+            return url
+        if not url.startswith("/") or url.startswith("//"):
+            return request.build_absolute_uri(url)
+        if not hasattr(self, "_url_prefix"):
+            self._url_prefix = request.build_absolute_uri("/")[:-1]
+        return self._url_prefix + url
+
+
+def validate_waste_type_id(value):
+    if value not in type_cache.get_waste_types():
+        raise serializers.ValidationError(f"Unknown waste type id {value}.")
+    return value
+
+
 class WasteRecordCreateSerializer(serializers.ModelSerializer):
-    type_id = serializers.IntegerField()
+    type_id = serializers.IntegerField(validators=[validate_waste_type_id])
 
     class Meta:
         model = WasteRecord
         fields = ["type_id", "confidence", "image"]
 
     def create(self, validated_data):
-        type_id = validated_data.pop("type_id")
-        waste_type = WasteType.objects.get(id=type_id)
-        waste_record = WasteRecord.objects.create(type=waste_type, **validated_data)
-        return waste_record
+        return create_records([validated_data], self.context)[0]
+
+
+class WasteRecordBulkItemSerializer(serializers.Serializer):
+    """One entry of a bulk upload; `image` is the uploaded file itself."""
+
+    type_id = serializers.IntegerField(validators=[validate_waste_type_id])
+    confidence = serializers.FloatField()
+    image = serializers.ImageField()
+    idempotency_key = serializers.CharField(max_length=64, required=False)
+
+
+def create_records(items, context=None):
+    """
+    Insert validated records with a single bulk INSERT.
+
+    Each upload is first streamed to storage in chunks, then all rows, their
+    rollup updates and live events are written in one transaction. Stored
+    images are removed again if the insert fails.
+    """
+    waste_types = type_cache.get_waste_types()
+    records = []
+    try:
+        for item in items:
+            record = WasteRecord(
+                type=waste_types[item["type_id"]],
+                confidence=item["confidence"],
+                idempotency_key=item.get("idempotency_key"),
+            )
+            record.image.save(item["image"].name, item["image"], save=False)
+            records.append(record)
+
+        with transaction.atomic():
+            WasteRecord.objects.bulk_create(records)
+            rollups.add_records(records)
+            caching.invalidate_on_commit()
+            for record in records:
+                events.record_created(
+                    record, WasteRecordListSerializer(record, context=context).data
+                )
+    except Exception:
+        for record in records:
+            record.image.delete(save=False)
+        raise
+
+    return records
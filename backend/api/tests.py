@@ -1,3 +1,946 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+import asyncio
+import io
+import json
+import threading
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import (
+    AsyncClient,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import numpy as np
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .models import (
+    WasteType,
+    WasteRecord,
+    WasteHourlyRollup,
+    WasteDailyRollup,
+    WasteRecordPrediction,
+)
+from .pagination import parse_page_size
+from .serializers import WasteRecordSerializer
+from . import caching, events, reclassify, rollups
+
+
+class WasteTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.plastic = WasteType.objects.create(
+            label="plastic", display_name="Plastic", color="#3B82F6"
+        )
+        cls.paper = WasteType.objects.create(
+            label="paper", display_name="Paper", color="#EAB308"
+        )
+        cls.glass = WasteType.objects.create(
+            label="glass", display_name="Glass", color="#10B981"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        caching.stats.reset()
+
+    def create_record(self, waste_type, confidence=90.0, timestamp=None):
+        record = WasteRecord.objects.create(
+            type=waste_type, confidence=confidence, image="waste_images/test.jpg"
+        )
+        if timestamp is not None:
+            # timestamp is auto_now_add, so backdate it with an update
+            WasteRecord.objects.filter(pk=record.pk).update(timestamp=timestamp)
+            record.timestamp = timestamp
+        rollups.add_records([record])
+        return record
+
+    def use_temp_media_root(self):
+        """Store uploaded images in a temporary MEDIA_ROOT for the rest of the test."""
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_image(self, name="image.jpg", size=(8, 8), color="black"):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, color).save(buffer, format="JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+class WasteAggregationTests(WasteTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_record(self.plastic, 80.0)
+        self.create_record(self.plastic, 90.0)
+        self.create_record(self.plastic, 100.0)
+        self.create_record(self.paper, 70.0)
+
+    def test_waste_stats(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("waste-stats"))
+
+        self.assertEqual(
+            response.json(),
+            {"totalItems": 4, "plasticCount": 3, "paperCount": 1, "glassCount": 0},
+        )
+
+    def test_waste_distribution(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("waste-distribution"))
+
+        data = {row["label"]: row for row in response.json()}
+        self.assertEqual(data["plastic"]["value"], 3)
+        self.assertEqual(data["plastic"]["percentage"], 75)
+        self.assertEqual(data["glass"]["percentage"], 0)
+        self.assertEqual(data["paper"]["color"], "#EAB308")
+
+    def test_waste_confidence(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("waste-confidence"))
+
+        data = {row["label"]: row for row in response.json()}
+        self.assertEqual(
+            {label: row["confidence"] for label, row in data.items()},
+            {"plastic": 90, "paper": 70, "glass": 0},
+        )
+        self.assertEqual(data["plastic"]["count"], 3)
+        self.assertAlmostEqual(data["plastic"]["confidence_sum"], 270)
+
+    def test_query_count_independent_of_type_count(self):
+        for i in range(10):
+            WasteType.objects.create(label=f"extra{i}", display_name=f"Extra {i}")
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse("waste-stats"))
+
+
+class WasteOverTimeTests(WasteTestMixin, TestCase):
+    tz = ZoneInfo("Asia/Ho_Chi_Minh")
+
+    def setUp(self):
+        super().setUp()
+        # 23:30 local on Jun 1 is still Jun 1 in Ho Chi Minh but Jun 1 16:30 UTC
+        self.create_record(
+            self.plastic, timestamp=datetime(2025, 6, 1, 23, 30, tzinfo=self.tz)
+        )
+        self.create_record(
+            self.plastic, timestamp=datetime(2025, 6, 3, 8, 0, tzinfo=self.tz)
+        )
+        self.create_record(
+            self.glass, timestamp=datetime(2025, 6, 3, 9, 15, tzinfo=self.tz)
+        )
+        # 00:30 local on Jun 4 falls outside an end date of Jun 3
+        self.create_record(
+            self.paper, timestamp=datetime(2025, 6, 4, 0, 30, tzinfo=self.tz)
+        )
+
+    def get(self, **params):
+        return self.client.get(reverse("waste-over-time"), params)
+
+    def test_daily_buckets_fill_gaps(self):
+        with self.assertNumQueries(2):
+            response = self.get(start="2025-06-01", end="2025-06-03")
+
+        data = response.json()
+        self.assertEqual(
+            [point["date"] for point in data], ["Jun 01", "Jun 02", "Jun 03"]
+        )
+        self.assertEqual([point["total"] for point in data], [1, 0, 2])
+        self.assertEqual(data[2]["glass"], 1)
+        self.assertEqual(data[2]["paper"], 0)
+
+    def test_hourly_buckets(self):
+        response = self.get(
+            bucket="hour", start="2025-06-03T08:00", end="2025-06-03T10:00"
+        )
+
+        data = response.json()
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0]["plastic"], 1)
+        self.assertEqual(data[1]["glass"], 1)
+
+    def test_weekly_buckets(self):
+        response = self.get(bucket="week", start="2025-06-01", end="2025-06-08")
+
+        data = response.json()
+        # Jun 1 2025 is a Sunday, so the range touches two ISO weeks
+        self.assertEqual([point["total"] for point in data], [1, 3])
+
+    def test_repeated_hour_at_dst_end_is_summed(self):
+        # 00:30 and 01:30 UTC are both 02:30 in Berlin when DST ends on Oct 26
+        for hour in (0, 1):
+            self.create_record(
+                self.paper,
+                timestamp=datetime(2025, 10, 26, hour, 30, tzinfo=ZoneInfo("UTC")),
+            )
+
+        response = self.get(
+            bucket="hour",
+            start="2025-10-26T01:00",
+            end="2025-10-26T04:00",
+            tz="Europe/Berlin",
+        )
+
+        data = {point["date"]: point["paper"] for point in response.json()}
+        self.assertEqual(
+            data, {"Oct 26 01:00": 0, "Oct 26 02:00": 2, "Oct 26 03:00": 0}
+        )
+
+    def test_timezone_parameter(self):
+        response = self.get(start="2025-06-01", end="2025-06-01", tz="UTC")
+
+        self.assertEqual(response.json()[0]["plastic"], 1)
+
+    def test_default_range_is_last_seven_days(self):
+        self.create_record(self.plastic)
+
+        data = self.get().json()
+        self.assertEqual(len(data), 7)
+        self.assertEqual(data[-1]["plastic"], 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get(bucket="minute").status_code, 400)
+        self.assertEqual(self.get(tz="Mars/Olympus").status_code, 400)
+        self.assertEqual(self.get(start="yesterday").status_code, 400)
+        self.assertEqual(
+            self.get(start="2025-06-03", end="2025-06-01").status_code, 400
+        )
+
+
+class WasteRollupTests(WasteTestMixin, TestCase):
+    tz = ZoneInfo("Asia/Ho_Chi_Minh")
+
+    def setUp(self):
+        super().setUp()
+        self.use_temp_media_root()
+
+    def rollup_state(self):
+        return {
+            model.__name__: sorted(
+                model.objects.values_list(
+                    "type_id",
+                    "bucket",
+                    "count",
+                    "confidence_sum",
+                    "confidence_min",
+                    "confidence_max",
+                )
+            )
+            for model in (WasteHourlyRollup, WasteDailyRollup)
+        }
+
+    def test_create_updates_rollups(self):
+        for confidence in (80.0, 95.0):
+            response = self.client.post(
+                reverse("wasterecord-list"),
+                {
+                    "type_id": self.glass.id,
+                    "confidence": confidence,
+                    "image": self.make_image(),
+                },
+            )
+            self.assertEqual(response.status_code, 201)
+
+        daily = WasteDailyRollup.objects.get(type=self.glass)
+        self.assertEqual(daily.count, 2)
+        self.assertEqual(daily.confidence_sum, 175.0)
+        self.assertEqual(daily.confidence_min, 80.0)
+        self.assertEqual(daily.confidence_max, 95.0)
+        self.assertEqual(WasteHourlyRollup.objects.get(type=self.glass).count, 2)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.create_record(
+            self.plastic, 60.0, datetime(2025, 6, 1, 23, 30, tzinfo=self.tz)
+        )
+        self.create_record(
+            self.plastic, 70.0, datetime(2025, 6, 1, 23, 45, tzinfo=self.tz)
+        )
+        self.create_record(
+            self.plastic, 80.0, datetime(2025, 6, 2, 0, 15, tzinfo=self.tz)
+        )
+        self.create_record(self.paper, 90.0, datetime(2025, 6, 2, 8, 0, tzinfo=self.tz))
+        incremental = self.rollup_state()
+
+        call_command("rebuild_rollups", stdout=io.StringIO())
+
+        self.assertEqual(self.rollup_state(), incremental)
+        self.assertEqual(WasteDailyRollup.objects.count(), 3)
+        self.assertEqual(WasteHourlyRollup.objects.count(), 3)
+
+    def test_rebuild_window_leaves_other_days(self):
+        self.create_record(
+            self.plastic, 60.0, datetime(2025, 6, 1, 12, 0, tzinfo=self.tz)
+        )
+        self.create_record(
+            self.plastic, 70.0, datetime(2025, 6, 2, 12, 0, tzinfo=self.tz)
+        )
+        WasteDailyRollup.objects.update(count=99)
+
+        call_command(
+            "rebuild_rollups",
+            start="2025-06-02",
+            end="2025-06-02",
+            stdout=io.StringIO(),
+        )
+
+        counts = dict(WasteDailyRollup.objects.values_list("bucket", "count"))
+        self.assertEqual(counts[datetime(2025, 6, 1).date()], 99)
+        self.assertEqual(counts[datetime(2025, 6, 2).date()], 1)
+
+    def test_delete_recomputes_rollups(self):
+        kept = self.create_record(self.plastic, 60.0)
+        removed = self.create_record(self.plastic, 90.0)
+
+        response = self.client.delete(reverse("wasterecord-detail", args=[removed.id]))
+
+        self.assertEqual(response.status_code, 204)
+        daily = WasteDailyRollup.objects.get(type=self.plastic)
+        self.assertEqual(daily.count, 1)
+        self.assertEqual(daily.confidence_max, kept.confidence)
+
+    def test_update_recomputes_rollups(self):
+        self.create_record(self.plastic, 60.0)
+        edited = self.create_record(self.plastic, 90.0)
+
+        response = self.client.patch(
+            reverse("wasterecord-detail", args=[edited.id]),
+            {"confidence": 70.0},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        daily = WasteDailyRollup.objects.get(type=self.plastic)
+        self.assertEqual(daily.count, 2)
+        self.assertEqual(daily.confidence_sum, 130.0)
+        self.assertEqual(daily.confidence_max, 70.0)
+
+    def test_admin_change_moves_rollups(self):
+        record = self.create_record(self.plastic, 60.0)
+        record.type = self.paper
+        model_admin = admin.site._registry[WasteRecord]
+
+        model_admin.save_model(RequestFactory().post("/"), record, None, change=True)
+
+        self.assertFalse(WasteDailyRollup.objects.filter(type=self.plastic).exists())
+        self.assertEqual(WasteDailyRollup.objects.get(type=self.paper).count, 1)
+
+    def test_admin_delete_recomputes_rollups(self):
+        self.create_record(self.plastic, 60.0)
+        self.create_record(self.plastic, 70.0)
+        kept = self.create_record(self.paper, 80.0)
+        model_admin = admin.site._registry[WasteRecord]
+
+        model_admin.delete_queryset(
+            RequestFactory().post("/"), WasteRecord.objects.filter(type=self.plastic)
+        )
+        model_admin.delete_model(RequestFactory().post("/"), kept)
+
+        self.assertFalse(WasteDailyRollup.objects.exists())
+        self.assertFalse(WasteHourlyRollup.objects.exists())
+
+    def test_stats_read_from_rollups(self):
+        self.create_record(self.plastic, 60.0)
+        WasteRecord.objects.all().delete()
+
+        response = self.client.get(reverse("waste-stats"))
+
+        self.assertEqual(response.json()["plasticCount"], 1)
+
+
+class WasteRecordFilterTests(WasteTestMixin, TestCase):
+    tz = ZoneInfo("Asia/Ho_Chi_Minh")
+
+    def setUp(self):
+        super().setUp()
+        self.before = self.create_record(
+            self.plastic, timestamp=datetime(2025, 6, 1, 23, 59, tzinfo=self.tz)
+        )
+        self.first = self.create_record(
+            self.plastic, timestamp=datetime(2025, 6, 2, 0, 0, tzinfo=self.tz)
+        )
+        self.last = self.create_record(
+            self.glass, timestamp=datetime(2025, 6, 3, 23, 59, tzinfo=self.tz)
+        )
+        self.after = self.create_record(
+            self.glass, timestamp=datetime(2025, 6, 4, 0, 0, tzinfo=self.tz)
+        )
+
+    def get_ids(self, **params):
+        response = self.client.get(reverse("wasterecord-list"), params)
+        return [record["id"] for record in response.json()["results"]]
+
+    def test_date_range_uses_local_days(self):
+        ids = self.get_ids(start_date="2025-06-02", end_date="2025-06-03")
+
+        self.assertEqual(ids, [self.last.id, self.first.id])
+
+    def test_type_and_date_filters_combine(self):
+        ids = self.get_ids(waste_types="glass", start_date="2025-06-03")
+
+        self.assertEqual(ids, [self.after.id, self.last.id])
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.get(reverse("wasterecord-list"), {"start_date": "june"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Tiny test tables always favour a sequential scan
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_timestamp_range_uses_index(self):
+        plan = self.explain(
+            WasteRecord.objects.filter(
+                timestamp__gte=datetime(2025, 6, 2, tzinfo=self.tz),
+                timestamp__lt=datetime(2025, 6, 4, tzinfo=self.tz),
+            )
+        )
+
+        self.assertIn("wasterecord_timestamp_idx", plan)
+
+    def test_type_and_timestamp_uses_composite_index(self):
+        plan = self.explain(
+            WasteRecord.objects.filter(
+                type=self.glass, timestamp__gte=datetime(2025, 6, 2, tzinfo=self.tz)
+            )
+        )
+
+        self.assertIn("wasterecord_type_ts_idx", plan)
+
+    def test_brin_index_command_needs_postgresql(self):
+        if connection.vendor == "postgresql":
+            self.skipTest("CREATE INDEX CONCURRENTLY cannot run inside a test")
+
+        with self.assertRaises(CommandError):
+            call_command("timestamp_brin_index", stdout=io.StringIO())
+
+
+class WasteRecordCursorPaginationTests(WasteTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        base = datetime(2025, 6, 1, 12, 0, tzinfo=ZoneInfo("UTC"))
+        # Pairs of records share a timestamp to exercise the id tie-breaker
+        self.records = [
+            self.create_record(self.plastic, timestamp=base + timedelta(minutes=i // 2))
+            for i in range(7)
+        ]
+        self.newest_first = sorted(
+            self.records, key=lambda record: (record.timestamp, record.id), reverse=True
+        )
+
+    def get(self, url=None, **params):
+        params.setdefault("pagination", "cursor")
+        if url is not None:
+            return self.client.get(url).json()
+        return self.client.get(reverse("wasterecord-list"), params).json()
+
+    def ids(self, page):
+        return [record["id"] for record in page["results"]]
+
+    def test_invalid_limit_falls_back_to_default_page_size(self):
+        for limit in ("0", "-3", "abc"):
+            self.assertEqual(len(self.get(limit=limit)["results"]), 7)
+
+    def test_walks_all_pages_without_gaps(self):
+        page = self.get(limit=3)
+        seen = self.ids(page)
+        self.assertIsNone(page["previous"])
+        while page["next"]:
+            page = self.get(page["next"])
+            seen += self.ids(page)
+
+        self.assertEqual(seen, [record.id for record in self.newest_first])
+        self.assertEqual(len(self.ids(page)), 1)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.get(limit=3)
+        second = self.get(first["next"])
+
+        self.assertEqual(self.ids(self.get(second["previous"])), self.ids(first))
+
+    def test_inserts_while_paging_do_not_shift_pages(self):
+        first = self.get(limit=3)
+        self.create_record(self.glass)
+
+        second = self.get(first["next"])
+
+        expected = [record.id for record in self.newest_first[3:6]]
+        self.assertEqual(self.ids(second), expected)
+
+    def test_count_is_opt_in(self):
+        with CaptureQueriesContext(connection) as queries:
+            page = self.get(limit=3)
+
+        self.assertIsNone(page["count"])
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+        self.assertEqual(self.get(limit=3, count="exact")["count"], 7)
+        self.assertEqual(self.get(limit=3, count="approximate")["count"], 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            reverse("wasterecord-list"), {"pagination": "cursor", "cursor": "bogus"}
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_mode_is_unchanged(self):
+        page = self.client.get(reverse("wasterecord-list"), {"limit": 3}).json()
+
+        self.assertEqual(
+            set(page),
+            {"results", "count", "next", "previous", "total_pages", "current_page"},
+        )
+        self.assertEqual(page["total_pages"], 3)
+        self.assertEqual(
+            self.ids(page), [record.id for record in self.newest_first[:3]]
+        )
+
+
+class PageSizeTests(SimpleTestCase):
+    def test_parse_page_size(self):
+        self.assertEqual(parse_page_size("5", 100), 5)
+        self.assertEqual(parse_page_size("500", 100), 100)
+        for value in ("0", "-3", "abc", "", "2.5"):
+            with self.assertRaises(ValueError):
+                parse_page_size(value, 100)
+
+
+class WasteRecordListQueryTests(WasteTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(30):
+            self.create_record((self.plastic, self.paper, self.glass)[i % 3])
+
+    def test_list_query_count_is_constant(self):
+        with self.assertNumQueries(2):  # COUNT(*) + page
+            response = self.client.get(reverse("wasterecord-list"), {"limit": 30})
+        self.assertEqual(len(response.json()["results"]), 30)
+
+        with self.assertNumQueries(1):
+            self.client.get(
+                reverse("wasterecord-list"), {"pagination": "cursor", "limit": 30}
+            )
+
+    def test_recent_detections_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("recent-detections"), {"limit": 30})
+        self.assertEqual(len(response.json()), 30)
+
+    def test_list_output_matches_model_serializer(self):
+        response = self.client.get(reverse("wasterecord-list"), {"limit": 30})
+        expected = WasteRecordSerializer(
+            WasteRecord.objects.order_by("-timestamp", "-id"),
+            many=True,
+            context={"request": response.wsgi_request},
+        ).data
+
+        self.assertEqual(response.json()["results"], [dict(row) for row in expected])
+
+
+class EventBrokerTests(SimpleTestCase):
+    async def test_publish_from_another_thread_reaches_all_subscribers(self):
+        broker = events.EventBroker()
+        first, second = broker.subscribe(), broker.subscribe()
+
+        thread = threading.Thread(target=broker.publish, args=("record", {"id": 1}))
+        thread.start()
+        thread.join()
+
+        for subscription in (first, second):
+            message = await asyncio.wait_for(subscription.get(), timeout=1)
+            self.assertEqual(message, {"id": 1, "event": "record", "data": {"id": 1}})
+
+    async def test_slow_subscriber_drops_oldest_events(self):
+        broker = events.EventBroker(max_queue=2)
+        subscription = broker.subscribe()
+
+        for i in range(3):
+            broker.publish("record", {"id": i})
+        await asyncio.sleep(0)
+
+        self.assertEqual(subscription.dropped, 1)
+        self.assertEqual((await subscription.get())["data"], {"id": 1})
+
+    async def test_live_events_stream(self):
+        response = await AsyncClient().get(reverse("live-events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+        events.broker.publish("stats", {"label": "glass", "count": 1})
+        frame = await asyncio.wait_for(anext(stream), timeout=1)
+        await stream.aclose()
+
+        self.assertRegex(
+            frame, rb'^id: \d+\nevent: stats\ndata: {"label": "glass", "count": 1}\n\n$'
+        )
+
+    async def test_events_are_numbered_consecutively(self):
+        broker = events.EventBroker()
+        subscription = broker.subscribe()
+
+        broker.publish("record", {"id": 1})
+        broker.publish("stats", {"count": 1})
+        await asyncio.sleep(0)
+
+        first, second = await subscription.get(), await subscription.get()
+        self.assertEqual((first["id"], second["id"]), (1, 2))
+
+
+class WasteRecordEventTests(WasteTestMixin, TestCase):
+    def test_create_and_delete_publish_after_commit(self):
+        published = []
+        self.addCleanup(setattr, events.broker, "publish", events.broker.publish)
+        events.broker.publish = lambda event, data: published.append((event, data))
+        self.use_temp_media_root()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("wasterecord-list"),
+                {
+                    "type_id": self.paper.id,
+                    "confidence": 88.0,
+                    "image": self.make_image("a.jpg"),
+                },
+            )
+        record = WasteRecord.objects.get()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([event for event, _ in published], ["record", "stats"])
+        self.assertEqual(published[0][1]["id"], record.id)
+        self.assertEqual(published[1][1]["count"], 1)
+
+        published.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("wasterecord-detail", args=[record.id]))
+
+        self.assertEqual(
+            published[0],
+            (
+                "record-deleted",
+                {
+                    "id": record.id,
+                    "type_id": self.paper.id,
+                    "type": "paper",
+                    "timestamp": record.timestamp.isoformat(),
+                },
+            ),
+        )
+        self.assertEqual(published[1][1]["count"], -1)
+
+
+class AnalyticsCacheTests(WasteTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_record(self.plastic, 80.0)
+
+    def test_repeat_requests_are_served_from_cache(self):
+        first = self.client.get(reverse("waste-stats"))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse("waste-stats"))
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first["ETag"], second["ETag"])
+        counts = self.client.get(reverse("cache-stats")).json()
+        self.assertEqual(counts["endpoints"]["waste_stats"]["hits"], 1)
+        self.assertEqual(counts["endpoints"]["waste_stats"]["misses"], 1)
+
+    def test_query_parameters_are_part_of_the_key(self):
+        self.client.get(reverse("waste-over-time"), {"bucket": "day"})
+        with self.assertNumQueries(2):
+            self.client.get(reverse("waste-over-time"), {"bucket": "hour"})
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(reverse("waste-distribution"))["ETag"]
+
+        response = self.client.get(
+            reverse("waste-distribution"), HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(caching.stats.snapshot()["totals"]["not_modified"], 1)
+
+    def test_create_invalidates_after_commit(self):
+        before = self.client.get(reverse("waste-stats"))
+        self.use_temp_media_root()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("wasterecord-list"),
+                {
+                    "type_id": self.plastic.id,
+                    "confidence": 70.0,
+                    "image": self.make_image("a.jpg"),
+                },
+            )
+        after = self.client.get(
+            reverse("waste-stats"), HTTP_IF_NONE_MATCH=before["ETag"]
+        )
+
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.json()["plasticCount"], 2)
+
+    def test_delete_invalidates_after_commit(self):
+        record = WasteRecord.objects.get()
+        self.client.get(reverse("recent-detections"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("wasterecord-detail", args=[record.id]))
+
+        self.assertEqual(self.client.get(reverse("recent-detections")).json(), [])
+
+
+class WasteRecordBulkTests(WasteTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_temp_media_root()
+
+    def post(self, records, files):
+        return self.client.post(
+            reverse("wasterecord-bulk"),
+            {"records": json.dumps(records), **files},
+            format="multipart",
+        )
+
+    def test_bulk_create(self):
+        records = [
+            {"type_id": self.glass.id, "confidence": 90 + i, "image": f"img{i}"}
+            for i in range(20)
+        ]
+        files = {f"img{i}": self.make_image(f"{i}.jpg") for i in range(20)}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post(records, files)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 20)
+        self.assertEqual(WasteRecord.objects.count(), 20)
+        self.assertEqual(WasteDailyRollup.objects.get(type=self.glass).count, 20)
+        ids = [result["id"] for result in response.json()["results"]]
+        self.assertEqual(
+            sorted(ids), sorted(WasteRecord.objects.values_list("id", flat=True))
+        )
+
+    def test_query_count_does_not_grow_per_record(self):
+        def query_count(n):
+            records = [
+                {"type_id": self.paper.id, "confidence": 80, "image": f"img{i}"}
+                for i in range(n)
+            ]
+            files = {f"img{i}": self.make_image(f"{i}.jpg") for i in range(n)}
+            with CaptureQueriesContext(connection) as queries:
+                self.post(records, files)
+            return len(queries)
+
+        # Warm the waste type cache and the rollup rows for this hour
+        query_count(1)
+        self.assertEqual(query_count(2), query_count(10))
+
+    def test_invalid_items_are_reported_per_item(self):
+        records = [
+            {"type_id": self.glass.id, "confidence": 90, "image": "ok"},
+            {"type_id": 999, "confidence": 90, "image": "bad_type"},
+            {"type_id": self.glass.id, "confidence": 90, "image": "missing"},
+            "not an object",
+        ]
+        files = {"ok": self.make_image("ok.jpg"), "bad_type": self.make_image("b.jpg")}
+
+        response = self.post(records, files)
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["created", "invalid", "invalid", "invalid"],
+        )
+        self.assertIn("type_id", results[1]["errors"])
+        self.assertIn("image", results[2]["errors"])
+        self.assertEqual(WasteRecord.objects.count(), 1)
+
+    def test_idempotency_keys_deduplicate_retries(self):
+        records = [
+            {
+                "type_id": self.glass.id,
+                "confidence": 90,
+                "image": "a",
+                "idempotency_key": "k1",
+            },
+            {
+                "type_id": self.glass.id,
+                "confidence": 90,
+                "image": "b",
+                "idempotency_key": "k2",
+            },
+        ]
+        first = self.post(
+            records, {"a": self.make_image("a.jpg"), "b": self.make_image("b.jpg")}
+        )
+        records.append(
+            {
+                "type_id": self.paper.id,
+                "confidence": 80,
+                "image": "c",
+                "idempotency_key": "k2",
+            }
+        )
+
+        retry = self.post(
+            records,
+            {
+                "a": self.make_image("a.jpg"),
+                "b": self.make_image("b.jpg"),
+                "c": self.make_image("c.jpg"),
+            },
+        )
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json()["created"], 0)
+        self.assertEqual(
+            [result["status"] for result in retry.json()["results"]], ["duplicate"] * 3
+        )
+        first_ids = [result["id"] for result in first.json()["results"]]
+        retry_ids = [result["id"] for result in retry.json()["results"]]
+        self.assertEqual(retry_ids, first_ids + [first_ids[1]])
+        self.assertEqual(WasteRecord.objects.count(), 2)
+
+    def test_malformed_payload(self):
+        response = self.client.post(
+            reverse("wasterecord-bulk"), {"records": "nope"}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_create_rejects_unknown_type(self):
+        response = self.client.post(
+            reverse("wasterecord-list"),
+            {"type_id": 999, "confidence": 90, "image": self.make_image("a.jpg")},
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class FakeClassifier:
+    """Predicts "paper" for bright images and "glass" for dark ones."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, batch):
+        self.batch_sizes.append(len(batch))
+        probabilities = []
+        for image in batch:
+            if image.mean() > 0:
+                probabilities.append([0.1, 0.1, 0.7, 0.1])
+            else:
+                probabilities.append([0.6, 0.2, 0.1, 0.1])
+        return np.array(probabilities, dtype=np.float32)
+
+
+class ReclassifyRecordsTests(WasteTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        WasteType.objects.create(label="metal", display_name="Metal", color="#6B7280")
+        self.use_temp_media_root()
+
+        self.model_path = f"{self.media_root}/model.onnx"
+        with open(self.model_path, "wb") as f:
+            f.write(b"weights")
+        self.classifier = FakeClassifier()
+        patcher = mock.patch.object(
+            reclassify, "load_classifier", return_value=self.classifier
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_image_record(self, color):
+        record = WasteRecord(type=self.plastic, confidence=90.0)
+        record.image.save("test.jpg", self.make_image("test.jpg", (32, 32), color))
+        return record
+
+    def reclassify(self, *args):
+        call_command(
+            "reclassify_records",
+            self.model_path,
+            "--model-version",
+            "v2",
+            *args,
+            stdout=io.StringIO(),
+        )
+
+    def test_stores_predictions_per_model_version(self):
+        bright = self.create_image_record("white")
+        dark = self.create_image_record("black")
+        broken = self.create_image_record("white")
+        with open(broken.image.path, "wb") as f:
+            f.write(b"not an image")
+
+        self.reclassify("--batch-size", "1")
+
+        predictions = {
+            p.record_id: p
+            for p in WasteRecordPrediction.objects.filter(model_version="v2")
+        }
+        self.assertEqual(set(predictions), {bright.id, dark.id})
+        self.assertEqual(predictions[bright.id].type, self.paper)
+        self.assertAlmostEqual(predictions[bright.id].confidence, 70.0, places=3)
+        self.assertEqual(predictions[dark.id].type, self.glass)
+        self.assertEqual(
+            set(predictions[dark.id].probabilities), set(reclassify.CLASS_LABELS)
+        )
+        self.assertEqual(self.classifier.batch_sizes, [1, 1])
+
+    def test_resumes_from_checkpoint(self):
+        records = [self.create_image_record("white") for _ in range(5)]
+
+        self.reclassify("--limit", "2", "--chunk-size", "1")
+        self.assertEqual(
+            list(WasteRecordPrediction.objects.values_list("record_id", flat=True)),
+            [record.id for record in records[:2]],
+        )
+
+        self.reclassify("--chunk-size", "2", "--batch-size", "4")
+        self.assertEqual(
+            list(WasteRecordPrediction.objects.values_list("record_id", flat=True)),
+            [record.id for record in records],
+        )
+        # The resumed run only classified the three remaining records
+        self.assertEqual(self.classifier.batch_sizes, [1, 1, 2, 1])
+
+    def test_rejects_non_positive_limit(self):
+        self.create_image_record("white")
+
+        with self.assertRaises(CommandError):
+            self.reclassify("--limit", "0")
+
+        run = reclassify.Reclassifier(self.classifier, "v2").run(limit=0)
+        self.assertEqual(run, (0, 0))
+        self.assertFalse(WasteRecordPrediction.objects.exists())
+
+    def test_restart_reclassifies_everything(self):
+        self.create_image_record("white")
+        self.create_image_record("black")
+        self.reclassify()
+
+        self.reclassify("--restart")
+
+        self.assertEqual(WasteRecordPrediction.objects.count(), 2)
+        self.assertEqual(self.classifier.batch_sizes, [2, 2])
@@ -0,0 +1,178 @@
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db.models import Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import WasteType, WasteHourlyRollup
+
+# bucket name -> (Trunc kind, step, default span, label format)
+BUCKETS = {
+    "hour": ("hour", timedelta(hours=1), timedelta(hours=24), "%b %d %H:00"),
+    "day": ("day", timedelta(days=1), timedelta(days=7), "%b %d"),
+    "week": ("week", timedelta(weeks=1), timedelta(weeks=12), "%b %d"),
+}
+MAX_BUCKETS = 2000
+
+
+def get_timezone(name=None):
+    """Resolve a tz name, falling back to settings.TIME_ZONE."""
+    if not name:
+        return timezone.get_default_timezone()
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError({"tz": f"Unknown time zone '{name}'."})
+
+
+def local_midnight(day, tz):
+    """Aware datetime for the start of `day` in `tz`."""
+    return datetime.combine(day, datetime.min.time(), tzinfo=tz)
+
+
+def parse_bound(value, tz, field):
+    """
+    Parse a `YYYY-MM-DD` date or ISO datetime query parameter.
+
+    Dates are returned as-is so the caller can decide whether they are an
+    inclusive start or end; naive datetimes are interpreted in `tz`.
+    """
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value) or parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({field: f"Invalid date '{value}'."})
+    if isinstance(parsed, datetime) and timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=tz)
+    return parsed
+
+
+def date_range_bounds(start, end, tz):
+    """
+    Convert inclusive start/end bounds to a half-open [start, end) range of
+    aware datetimes. A date `end` covers that whole local day.
+    """
+    if isinstance(start, date) and not isinstance(start, datetime):
+        start = local_midnight(start, tz)
+    if isinstance(end, date) and not isinstance(end, datetime):
+        end = local_midnight(end + timedelta(days=1), tz)
+    return start, end
+
+
+def truncate(value, bucket):
+    """Floor a local naive datetime to the start of its bucket."""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if bucket == "hour":
+        return value
+    value = value.replace(hour=0)
+    if bucket == "week":
+        value -= timedelta(days=value.weekday())
+    return value
+
+
+def resolve_time_range(params):
+    """
+    Read bucket/start/end/tz query parameters.
+
+    Returns (bucket, start, end, tz) where start/end are aware datetimes
+    forming a half-open range. Missing bounds default to the bucket's span
+    ending with the current bucket.
+    """
+    bucket = params.get("bucket") or "day"
+    if bucket not in BUCKETS:
+        raise ValidationError({"bucket": f"Must be one of: {', '.join(BUCKETS)}."})
+    tz = get_timezone(params.get("tz"))
+    _, step, span, _ = BUCKETS[bucket]
+
+    start, end = date_range_bounds(
+        parse_bound(params.get("start"), tz, "start"),
+        parse_bound(params.get("end"), tz, "end"),
+        tz,
+    )
+    if end is None:
+        now = timezone.localtime(timezone.now(), tz).replace(tzinfo=None)
+        end = truncate(now, bucket).replace(tzinfo=tz) + step
+    if start is None:
+        start = end - span
+    if start >= end:
+        raise ValidationError({"start": "Must be before end."})
+    if (end - start) / step > MAX_BUCKETS:
+        raise ValidationError(
+            {"bucket": f"Range spans more than {MAX_BUCKETS} buckets."}
+        )
+
+    return bucket, start, end, tz
+
+
+def iter_buckets(start, end, bucket, tz):
+    """Yield local naive bucket starts covering [start, end)."""
+    _, step, _, _ = BUCKETS[bucket]
+    current = truncate(timezone.localtime(start, tz).replace(tzinfo=None), bucket)
+    last = timezone.localtime(end, tz).replace(tzinfo=None)
+    while current < last:
+        yield current
+        current += step
+
+
+def counts_over_time(start, end, bucket="day", tz=None):
+    """
+    Per-type record counts grouped into time buckets.
+
+    All buckets and types are produced by one grouped query over the hourly
+    rollups in the [start, end) range, so `start` and `end` are effectively
+    rounded to whole hours. Buckets with no records are filled with zeros in
+    Python.
+    """
+    tz = tz or timezone.get_default_timezone()
+    kind, _, _, label_format = BUCKETS[bucket]
+    first_hour = truncate(timezone.localtime(start, tz).replace(tzinfo=None), "hour")
+
+    rows = (
+        WasteHourlyRollup.objects.filter(
+            bucket__gte=first_hour.replace(tzinfo=tz), bucket__lt=end
+        )
+        .annotate(period=Trunc("bucket", kind, tzinfo=tz))
+        .values("period", "type_id")
+        .annotate(count=Sum("count"))
+        .order_by()
+    )
+    counts = {}
+    for row in rows:
+        # Rows for the repeated hour at the end of DST share a local bucket
+        key = (
+            timezone.localtime(row["period"], tz).replace(tzinfo=None),
+            row["type_id"],
+        )
+        counts[key] = counts.get(key, 0) + row["count"]
+
+    return build_series(
+        iter_buckets(start, end, bucket, tz),
+        WasteType.objects.values_list("id", "label"),
+        counts,
+        label_format,
+        tz,
+    )
+
+
+def build_series(bucket_starts, waste_types, counts, label_format, tz):
+    """Lay out {(bucket_start, type_id): count} as one data point per bucket."""
+    waste_types = list(waste_types)
+    result = []
+    for bucket_start in bucket_starts:
+        data_point = {
+            "date": bucket_start.strftime(label_format),
+            "timestamp": bucket_start.replace(tzinfo=tz).isoformat(),
+            "total": 0,
+        }
+        for type_id, label in waste_types:
+            type_count = counts.get((bucket_start, type_id), 0)
+            data_point[label] = type_count
+            data_point["total"] += type_count
+        result.append(data_point)
+    return result
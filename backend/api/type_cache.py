@@ -0,0 +1,24 @@
+from .caching import get_cache
+from .models import WasteType
+
+CACHE_KEY = "waste-types:by-id"
+CACHE_TIMEOUT = 300
+
+
+def get_waste_types():
+    """
+    Map of waste type id -> WasteType, cached so validating and creating
+    records does not query the (rarely changing) type table every time.
+    """
+    cache = get_cache()
+    waste_types = cache.get(CACHE_KEY)
+    if waste_types is None:
+        waste_types = {
+            waste_type.id: waste_type for waste_type in WasteType.objects.all()
+        }
+        cache.set(CACHE_KEY, waste_types, CACHE_TIMEOUT)
+    return waste_types
+
+
+def clear():
+    get_cache().delete(CACHE_KEY)
@@ -15,5 +15,7 @@ urlpatterns = [
     path("api/waste-confidence/", views.waste_confidence, name="waste-confidence"),
     path("api/waste-over-time/", views.waste_over_time, name="waste-over-time"),
     path("api/recent-detections/", views.recent_detections, name="recent-detections"),
+    path("api/live/", views.live_events, name="live-events"),
+    path("api/cache-stats/", views.cache_stats, name="cache-stats"),
     
 ]
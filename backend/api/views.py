@@ -1,19 +1,37 @@
-from django.shortcuts import render
-from django.db.models import Count, Avg
-from django.utils import timezone
-from datetime import timedelta
+import asyncio
+import copy
+import json
+
+from django.http import StreamingHttpResponse
+from django.db import transaction
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from rest_framework.views import APIView
 
 from .models import WasteType, WasteRecord
 from .serializers import (
     WasteTypeSerializer,
     WasteRecordSerializer,
+    WasteRecordListSerializer,
     WasteRecordCreateSerializer,
+    WasteRecordBulkItemSerializer,
+    create_records,
+)
+from .pagination import CustomPageNumberPagination, TimestampCursorPagination
+from .aggregations import summarize_by_type
+from . import caching, events, rollups
+from .caching import cache_analytics
+from .timeseries import (
+    counts_over_time,
+    date_range_bounds,
+    get_timezone,
+    parse_bound,
+    resolve_time_range,
 )
-from .pagination import CustomPageNumberPagination
+
+BULK_MAX_RECORDS = 500
 
 
 class WasteTypeViewSet(viewsets.ReadOnlyModelViewSet):
@@ -26,9 +44,24 @@ class WasteRecordViewSet(viewsets.ModelViewSet):
     queryset = WasteRecord.objects.all()
     pagination_class = CustomPageNumberPagination
 
+    @property
+    def paginator(self):
+        """
+        Page-number pagination by default; `?pagination=cursor` switches to
+        keyset pagination over (timestamp, id) for deep history browsing.
+        """
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get("pagination") == "cursor":
+                self._paginator = TimestampCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_serializer_class(self):
         if self.action == "create":
             return WasteRecordCreateSerializer
+        if self.action == "list":
+            return WasteRecordListSerializer
         return WasteRecordSerializer
 
     def get_serializer_context(self):
@@ -36,8 +69,121 @@ class WasteRecordViewSet(viewsets.ModelViewSet):
         context["request"] = self.request
         return context
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        parser_classes=[MultiPartParser],
+    )
+    def bulk(self, request):
+        """
+        Create many records in one multipart request.
+
+        `records` is a JSON array of {"type_id", "confidence", "image"} where
+        "image" names the multipart file field holding that record's image.
+        Valid items are inserted together; every item gets a result entry.
+        Items may carry an "idempotency_key"; keys that were already stored
+        are reported as "duplicate" with the existing id instead of being
+        inserted again, so bins can safely retry a batch.
+        """
+        try:
+            items = json.loads(request.data.get("records", ""))
+        except ValueError:
+            items = None
+        if not isinstance(items, list) or not items:
+            raise ValidationError({"records": "Must be a non-empty JSON array."})
+        if len(items) > BULK_MAX_RECORDS:
+            raise ValidationError(
+                {"records": f"At most {BULK_MAX_RECORDS} records per request."}
+            )
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {
+                    "index": index,
+                    "status": "invalid",
+                    "errors": {"non_field_errors": ["Must be an object."]},
+                }
+                continue
+            serializer = WasteRecordBulkItemSerializer(
+                data={**item, "image": request.FILES.get(str(item.get("image")))}
+            )
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {
+                    "index": index,
+                    "status": "invalid",
+                    "errors": serializer.errors,
+                }
+
+        keys = [
+            data["idempotency_key"] for _, data in valid if "idempotency_key" in data
+        ]
+        existing = dict(
+            WasteRecord.objects.filter(idempotency_key__in=keys).values_list(
+                "idempotency_key", "id"
+            )
+        )
+        new, duplicates, batch_keys = [], [], set()
+        for index, data in valid:
+            key = data.get("idempotency_key")
+            if key is not None and (key in existing or key in batch_keys):
+                duplicates.append((index, key))
+            else:
+                new.append((index, data))
+                if key is not None:
+                    batch_keys.add(key)
+
+        records = create_records(
+            [data for _, data in new], self.get_serializer_context()
+        )
+        for (index, _), record in zip(new, records):
+            results[index] = {"index": index, "status": "created", "id": record.id}
+            if record.idempotency_key is not None:
+                existing[record.idempotency_key] = record.id
+        for index, key in duplicates:
+            results[index] = {
+                "index": index,
+                "status": "duplicate",
+                "id": existing[key],
+            }
+
+        failed = len(items) - len(valid)
+        return Response(
+            {
+                "created": len(records),
+                "duplicates": len(duplicates),
+                "failed": failed,
+                "results": results,
+            },
+            status=(
+                status.HTTP_201_CREATED if not failed else status.HTTP_207_MULTI_STATUS
+            ),
+        )
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous = copy.copy(serializer.instance)
+        super().perform_update(serializer)
+        rollups.update_records([previous], [serializer.instance])
+        caching.invalidate_on_commit()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        events.record_deleted(instance)
+        super().perform_destroy(instance)
+        rollups.remove_records([instance])
+        caching.invalidate_on_commit()
+
     def get_queryset(self):
-        queryset = WasteRecord.objects.all().order_by("-timestamp")
+        queryset = WasteRecord.objects.select_related("type").order_by(
+            "-timestamp", "-id"
+        )
+        if self.action == "list":
+            queryset = queryset.only(*WasteRecordListSerializer.query_fields)
 
         # Support for waste_types filtering
         waste_types = self.request.query_params.get("waste_types")
@@ -45,118 +191,104 @@ class WasteRecordViewSet(viewsets.ModelViewSet):
             waste_type_list = waste_types.split(",")
             queryset = queryset.filter(type__label__in=waste_type_list)
 
-        # Support for date range filtering
-        start_date = self.request.query_params.get("start_date")
-        if start_date:
-            queryset = queryset.filter(timestamp__date__gte=start_date)
-
-        end_date = self.request.query_params.get("end_date")
-        if end_date:
-            queryset = queryset.filter(timestamp__date__lte=end_date)
+        # Support for date range filtering as a half-open timestamp range in
+        # the local time zone, so the timestamp indexes can be used
+        tz = get_timezone()
+        start, end = date_range_bounds(
+            parse_bound(self.request.query_params.get("start_date"), tz, "start_date"),
+            parse_bound(self.request.query_params.get("end_date"), tz, "end_date"),
+            tz,
+        )
+        if start is not None:
+            queryset = queryset.filter(timestamp__gte=start)
+        if end is not None:
+            queryset = queryset.filter(timestamp__lt=end)
 
         return queryset
 
 
 @api_view(["GET"])
+@cache_analytics
 def waste_stats(request):
     """
     Get statistics about waste collection:
     - Total items
     - Count for each waste type
     """
-    total_items = WasteRecord.objects.count()
+    total_items, summary = summarize_by_type()
 
-    # Get counts for each waste type
-    waste_types = WasteType.objects.all()
     stats = {"totalItems": total_items}
-
-    for waste_type in waste_types:
-        type_count = WasteRecord.objects.filter(type=waste_type).count()
-        stats[f"{waste_type.label}Count"] = type_count
+    for row in summary:
+        stats[f"{row['label']}Count"] = row["count"]
 
     return Response(stats)
 
 
 @api_view(["GET"])
+@cache_analytics
 def waste_distribution(request):
     """
     Get distribution of waste types for charts
     """
-    total_items = WasteRecord.objects.count()
-    waste_types = WasteType.objects.all()
-
-    distribution = []
-    for waste_type in waste_types:
-        count = WasteRecord.objects.filter(type=waste_type).count()
-        percentage = round((count / total_items) * 100) if total_items > 0 else 0
-
-        distribution.append(
-            {
-                "name": waste_type.display_name,
-                "value": count,
-                "color": waste_type.color,
-                "percentage": percentage,
-            }
-        )
+    _, summary = summarize_by_type()
+
+    distribution = [
+        {
+            "label": row["label"],
+            "name": row["name"],
+            "value": row["count"],
+            "color": row["color"],
+            "percentage": row["percentage"],
+        }
+        for row in summary
+    ]
 
     return Response(distribution)
 
 
 @api_view(["GET"])
+@cache_analytics
 def waste_confidence(request):
     """
     Get average confidence scores for each waste type
     """
-    waste_types = WasteType.objects.all()
-
-    confidence_data = []
-    for waste_type in waste_types:
-        records = WasteRecord.objects.filter(type=waste_type)
-        avg_confidence = records.aggregate(avg=Avg("confidence"))["avg"] or 0
-
-        confidence_data.append(
-            {
-                "name": waste_type.display_name,
-                "confidence": round(avg_confidence),
-                "color": waste_type.color,
-            }
-        )
+    _, summary = summarize_by_type()
+
+    confidence_data = [
+        {
+            "label": row["label"],
+            "name": row["name"],
+            "confidence": row["confidence"],
+            "color": row["color"],
+            # Exact totals so live "stats" deltas can update the average
+            "count": row["count"],
+            "confidence_sum": row["confidence_sum"],
+        }
+        for row in summary
+    ]
 
     return Response(confidence_data)
 
 
 @api_view(["GET"])
+@cache_analytics
 def waste_over_time(request):
     """
-    Get waste records grouped by day for the last 7 days
-    """
-    waste_types = WasteType.objects.all()
-    result = []
-
-    # Generate data for the last 7 days
-    today = timezone.now().date()
-
-    for i in range(6, -1, -1):
-        date = today - timedelta(days=i)
-        next_date = date + timedelta(days=1)
-
-        # Get records for this day
-        day_records = WasteRecord.objects.filter(timestamp__date=date)
-
-        # Create data point with dynamic waste type counts
-        data_point = {"date": date.strftime("%b %d"), "total": 0}  # Format: "May 14"
+    Get waste record counts per type grouped into time buckets.
 
-        for waste_type in waste_types:
-            type_count = day_records.filter(type=waste_type).count()
-            data_point[waste_type.label] = type_count
-            data_point["total"] += type_count
+    Query parameters:
+    - bucket: hour, day (default) or week
+    - start / end: inclusive dates (YYYY-MM-DD) or ISO datetimes
+    - tz: IANA time zone name, defaults to settings.TIME_ZONE
 
-        result.append(data_point)
-
-    return Response(result)
+    Without start/end the last 7 days (24 hours, 12 weeks) are returned.
+    """
+    bucket, start, end, tz = resolve_time_range(request.query_params)
+    return Response(counts_over_time(start, end, bucket, tz))
 
 
 @api_view(["GET"])
+@cache_analytics
 def recent_detections(request):
     """
     Get the most recent waste detections
@@ -167,10 +299,63 @@ def recent_detections(request):
     except ValueError:
         limit = 5
 
-    recent_records = WasteRecord.objects.all().order_by("-timestamp")[:limit]
-    serializer = WasteRecordSerializer(
+    recent_records = (
+        WasteRecord.objects.select_related("type")
+        .only(*WasteRecordListSerializer.query_fields)
+        .order_by("-timestamp", "-id")[:limit]
+    )
+    serializer = WasteRecordListSerializer(
         recent_records, many=True, context={"request": request}
     )
 
     # Return direct array instead of paginated response
     return Response(serializer.data)
+
+
+@api_view(["GET"])
+def cache_stats(request):
+    """
+    Hit/miss/304 counters of the analytics response cache (this process only)
+    """
+    return Response(caching.stats.snapshot())
+
+
+LIVE_EVENTS_KEEPALIVE = 15  # seconds between SSE comment pings
+
+
+async def live_events(request):
+    """
+    Server-Sent Events stream of new detections and stat deltas.
+
+    Events:
+    - record: a newly created waste record (same shape as the list API)
+    - record-deleted: {"id", "type_id", "type", "timestamp"}
+    - stats: {"type_id", "label", "count", "confidence_sum"} deltas to apply
+      to the dashboard totals
+
+    Each event has a sequence number as its SSE id; a jump in the sequence
+    means the client missed events and should refetch.
+
+    Requires serving the project through ASGI (config.asgi).
+    """
+
+    async def stream():
+        subscription = events.broker.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.get(), timeout=LIVE_EVENTS_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield events.format_sse(message)
+        finally:
+            events.broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Disable proxy buffering
+    return response
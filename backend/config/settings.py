@@ -32,6 +32,7 @@ ALLOWED_HOSTS = ["*"]
 # Application definition
 
 INSTALLED_APPS = [
+    "daphne",  # ASGI runserver, needed for the /api/live/ event stream
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -72,6 +73,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 
 # Database
@@ -88,6 +90,29 @@ DATABASES = {
     }
 }
 
+# Bulk uploads from bins send one image file per record
+DATA_UPLOAD_MAX_NUMBER_FILES = 500
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# locmem is per-process; point "default" at Redis/Memcached when running
+# several workers so invalidation reaches all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "smartbin-analytics",
+    }
+}
+
+# Cache alias and lifetime (seconds) for analytics API responses
+ANALYTICS_CACHE = "default"
+ANALYTICS_CACHE_TIMEOUT = 60
+
+# An optional BRIN index on WasteRecord.timestamp helps range scans over
+# large tables on PostgreSQL; create it at any time with
+# `python manage.py timestamp_brin_index` (drop it again with --drop)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -1,7 +1,8 @@
 "use client"
 
 import { Skeleton } from "@/components/ui/skeleton"
-import { fetchWasteConfidence, fetchWasteDistribution } from "@/lib/api"
+import type { LiveStatsDelta } from "@/lib/api"
+import { fetchWasteConfidence, fetchWasteDistribution, subscribeToLiveEvents } from "@/lib/api"
 import { useEffect, useRef, useState } from "react"
 import {
   Bar,
@@ -25,7 +26,6 @@ export function WasteDistribution({ detailed = false, confidenceView = false })
 
   // Ref to store the current data for comparison
   const previousDataRef = useRef([])
-  const intervalRef = useRef<NodeJS.Timeout | null>(null)
 
   useEffect(() => {
     setWindowWidth(window.innerWidth)
@@ -87,24 +87,50 @@ export function WasteDistribution({ detailed = false, confidenceView = false })
     loadData(true)
   }, [confidenceView])
 
-  // Setup polling
-  useEffect(() => {
-    // Clear existing interval
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current)
+  // Apply a pushed stat delta to the chart rows
+  const applyDelta = (rows: any[], delta: LiveStatsDelta) => {
+    if (confidenceView) {
+      return rows.map((row) => {
+        if (row.label !== delta.label) return row
+        const count = row.count + delta.count
+        const confidenceSum = row.confidence_sum + delta.confidence_sum
+        return {
+          ...row,
+          count,
+          confidence_sum: confidenceSum,
+          confidence: count > 0 ? Math.round(confidenceSum / count) : 0,
+        }
+      })
     }
 
-    // Start polling every 5 seconds
-    intervalRef.current = setInterval(() => {
-      loadData(false)
-    }, 5000)
+    const updated = rows.map((row) => (row.label === delta.label ? { ...row, value: row.value + delta.count } : row))
+    const total = updated.reduce((sum, row) => sum + row.value, 0)
+    return updated.map((row) => ({
+      ...row,
+      percentage: total > 0 ? Math.round((row.value / total) * 100) : 0,
+    }))
+  }
 
-    // Cleanup on unmount or dependency change
-    return () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current)
-      }
-    }
+  // Apply pushed stat deltas locally; refetch only if events may have been missed
+  useEffect(() => {
+    // Unsubscribe on unmount or dependency change
+    return subscribeToLiveEvents(
+      ["stats"],
+      (delta: LiveStatsDelta) => {
+        const current: any[] = previousDataRef.current
+
+        // Every known type has a row, so a missing one means a new type
+        if (!current.some((row) => row.label === delta.label)) {
+          loadData(false)
+          return
+        }
+
+        const newData: any = applyDelta(current, delta)
+        setData(newData)
+        previousDataRef.current = newData
+      },
+      () => loadData(false),
+    )
   }, [confidenceView])
 
   if (error) {
@@ -2,7 +2,7 @@
 
 import { Skeleton } from "@/components/ui/skeleton"
 import type { WasteType } from "@/lib/api"
-import { fetchWasteOverTime, fetchWasteTypes } from "@/lib/api"
+import { fetchWasteOverTime, fetchWasteTypes, subscribeToLiveEvents } from "@/lib/api"
 import { useEffect, useRef, useState } from "react"
 import { CartesianGrid, Legend, Line, LineChart, ResponsiveContainer, Tooltip, XAxis, YAxis } from "recharts"
 
@@ -14,7 +14,6 @@ export function WasteOverTime({ detailed = false }) {
 
   // Ref to store the current data for comparison
   const previousDataRef = useRef([])
-  const intervalRef = useRef<NodeJS.Timeout | null>(null)
 
   // Function to check if data has changed
   const hasDataChanged = (newData: any[], oldData: any[]) => {
@@ -65,24 +64,50 @@ export function WasteOverTime({ detailed = false }) {
     loadData(true)
   }, [])
 
-  // Setup polling
-  useEffect(() => {
-    // Clear existing interval
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current)
-    }
-
-    // Start polling every 5 seconds
-    intervalRef.current = setInterval(() => {
-      loadData(false)
-    }, 5000)
+  // Add a pushed record (count 1) or deletion (count -1) to its bucket.
+  // Returns null when the data has to be refetched instead.
+  const applyRecord = (points: any[], label: string, timestamp: string, count: number) => {
+    // Bucket length is taken from the last two buckets
+    if (points.length < 2) return null
+    const starts = points.map((point) => new Date(point.timestamp).getTime())
+    const last = starts.length - 1
+    const time = new Date(timestamp).getTime()
+
+    // Older than the chart: nothing to update
+    if (time < starts[0]) return points
+    // Past the last bucket: the window has moved on
+    if (time >= starts[last] + (starts[last] - starts[last - 1])) return null
+
+    let index = last
+    while (starts[index] > time) index -= 1
+    if (!(label in points[index])) return null
+
+    return points.map((point, i) =>
+      i === index ? { ...point, [label]: point[label] + count, total: point.total + count } : point,
+    )
+  }
 
-    // Cleanup on unmount or dependency change
-    return () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current)
-      }
-    }
+  // Apply pushed records locally; refetch only if events may have been missed
+  useEffect(() => {
+    // Unsubscribe on unmount or dependency change
+    return subscribeToLiveEvents(
+      ["record", "record-deleted"],
+      (record: { type: string; timestamp: string }, event) => {
+        const newData: any = applyRecord(
+          previousDataRef.current,
+          record.type,
+          record.timestamp,
+          event === "record" ? 1 : -1,
+        )
+        if (newData === null) {
+          loadData(false)
+          return
+        }
+        setData(newData)
+        previousDataRef.current = newData
+      },
+      () => loadData(false),
+    )
   }, [])
 
   if (error) {
@@ -2,8 +2,8 @@
 
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Skeleton } from "@/components/ui/skeleton"
-import type { WasteType } from "@/lib/api"
-import { fetchWasteStats, fetchWasteTypes } from "@/lib/api"
+import type { LiveStatsDelta, WasteType } from "@/lib/api"
+import { fetchWasteStats, fetchWasteTypes, subscribeToLiveEvents } from "@/lib/api"
 import { Cog, Droplet, FileText, FlaskRoundIcon as Flask, Package, Trash2 } from "lucide-react"
 import { useEffect, useRef, useState } from "react"
 
@@ -24,7 +24,6 @@ export function WasteStats() {
 
   // Ref to store the current data for comparison
   const previousStatsRef = useRef<Record<string, number>>({ totalItems: 0 })
-  const intervalRef = useRef<NodeJS.Timeout | null>(null)
 
   // Function to check if stats have changed
   const hasStatsChanged = (newStats: Record<string, number>, oldStats: Record<string, number>) => {
@@ -69,24 +68,31 @@ export function WasteStats() {
     loadData(true)
   }, [])
 
-  // Setup polling
+  // Apply pushed stat deltas locally; refetch only if events may have been missed
   useEffect(() => {
-    // Clear existing interval
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current)
-    }
-
-    // Start polling every 5 seconds
-    intervalRef.current = setInterval(() => {
-      loadData(false)
-    }, 5000)
-
-    // Cleanup on unmount or dependency change
-    return () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current)
-      }
-    }
+    // Unsubscribe on unmount or dependency change
+    return subscribeToLiveEvents(
+      ["stats"],
+      (delta: LiveStatsDelta) => {
+        const current = previousStatsRef.current
+        const key = `${delta.label}Count`
+
+        // Every known type is in the stats, so a missing key means a new type
+        if (!(key in current)) {
+          loadData(false)
+          return
+        }
+
+        const newStats = {
+          ...current,
+          totalItems: current.totalItems + delta.count,
+          [key]: current[key] + delta.count,
+        }
+        setStats(newStats)
+        previousStatsRef.current = newStats
+      },
+      () => loadData(false),
+    )
   }, [])
 
   // Get an icon for a waste type
@@ -6,11 +6,14 @@ import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from "@/components/ui/dialog"
 import { Skeleton } from "@/components/ui/skeleton"
 import type { PaginatedResponse, WasteRecord, WasteRecordFilter, WasteType } from "@/lib/api"
-import { fetchWasteRecords, getWasteTypesMap } from "@/lib/api"
+import { fetchWasteRecords, getWasteTypesMap, subscribeToLiveEvents } from "@/lib/api"
 import { ChevronLeft, ChevronRight, Eye } from "lucide-react"
 import Image from "next/image"
 import { useEffect, useRef, useState } from "react"
 
+// Page size used by the records API when no limit is given
+const DEFAULT_PAGE_SIZE = 20
+
 interface WasteHistoryTableProps {
   filters: WasteRecordFilter
   onPageChange: (page: number) => void
@@ -24,7 +27,6 @@ export function WasteHistoryTable({ filters, onPageChange }: WasteHistoryTablePr
 
   // Refs to store the current data for comparison and interval
   const previousDataRef = useRef<PaginatedResponse<WasteRecord> | null>(null)
-  const intervalRef = useRef<NodeJS.Timeout | null>(null)
 
   // Function to check if data has changed
   const hasDataChanged = (newData: PaginatedResponse<WasteRecord> | null, oldData: PaginatedResponse<WasteRecord> | null) => {
@@ -81,24 +83,60 @@ export function WasteHistoryTable({ filters, onPageChange }: WasteHistoryTablePr
     loadData(true)
   }, [filters])
 
-  // Setup polling
-  useEffect(() => {
-    // Clear existing interval
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current)
+  // Update the current page for a pushed record (count 1) or deletion (count -1).
+  // Returns the data unchanged if the record is filtered out, or null when
+  // the page has to be refetched instead.
+  const applyRecord = (current: PaginatedResponse<WasteRecord>, record: WasteRecord, count: number) => {
+    if (filters.waste_types?.length && !filters.waste_types.includes(record.type)) {
+      return current
+    }
+    // Date ranges are resolved in the server's time zone, so let the server decide
+    if (filters.start_date || filters.end_date) {
+      return null
     }
 
-    // Start polling every 5 seconds
-    intervalRef.current = setInterval(() => {
-      loadData(false)
-    }, 5000)
+    const isListed = current.results.some((row) => row.id === record.id)
+    if (count > 0 && isListed) {
+      return current
+    }
+    // Only the server knows which record moves up to fill the gap
+    if (count < 0 && isListed) {
+      return null
+    }
 
-    // Cleanup on unmount or dependency change
-    return () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current)
-      }
+    const pageSize = filters.limit || DEFAULT_PAGE_SIZE
+    const total = current.count + count
+    const totalPages = Math.max(1, Math.ceil(total / pageSize))
+    // A page was added after the last one (it needs a "next" link) or the current page is gone
+    if ((totalPages > current.total_pages && !current.next) || totalPages < current.current_page) {
+      return null
     }
+
+    // Newest records come first, so only the first page shows a new record
+    const results =
+      count > 0 && current.current_page === 1 ? [record, ...current.results].slice(0, pageSize) : current.results
+    return { ...current, count: total, total_pages: totalPages, results }
+  }
+
+  // Apply pushed records locally; refetch only if events may have been missed
+  useEffect(() => {
+    // Unsubscribe on unmount or dependency change
+    return subscribeToLiveEvents(
+      ["record", "record-deleted"],
+      (record: WasteRecord, event) => {
+        const current = previousDataRef.current
+        if (!current) return
+
+        const newData = applyRecord(current, record, event === "record" ? 1 : -1)
+        if (newData === null) {
+          loadData(false)
+        } else if (newData !== current) {
+          setData(newData)
+          previousDataRef.current = newData
+        }
+      },
+      () => loadData(false),
+    )
   }, [filters])
 
   const handlePageChange = (newPage: number) => {
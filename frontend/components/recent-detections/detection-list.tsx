@@ -4,7 +4,7 @@ import { Badge } from "@/components/ui/badge"
 import { ScrollArea } from "@/components/ui/scroll-area"
 import { Skeleton } from "@/components/ui/skeleton"
 import type { WasteRecord, WasteType } from "@/lib/api"
-import { fetchRecentDetections, getWasteTypesMap } from "@/lib/api"
+import { fetchRecentDetections, getWasteTypesMap, subscribeToLiveEvents } from "@/lib/api"
 import Image from "next/image"
 import { useEffect, useRef, useState } from "react"
 
@@ -16,7 +16,6 @@ export function RecentDetections({ limit = 5 }) {
 
   // Ref to store the current data for comparison
   const previousDetectionsRef = useRef<WasteRecord[]>([])
-  const intervalRef = useRef<NodeJS.Timeout | null>(null)
 
   // Function to check if detections have changed
   const hasDetectionsChanged = (newDetections: WasteRecord[], oldDetections: WasteRecord[]) => {
@@ -67,24 +66,31 @@ export function RecentDetections({ limit = 5 }) {
     loadData(true)
   }, [limit])
 
-  // Setup polling
+  // Apply pushed records locally; refetch only if events may have been missed
   useEffect(() => {
-    // Clear existing interval
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current)
-    }
-
-    // Start polling every 5 seconds
-    intervalRef.current = setInterval(() => {
-      loadData(false)
-    }, 5000)
-
-    // Cleanup on unmount or dependency change
-    return () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current)
-      }
-    }
+    // Unsubscribe on unmount or dependency change
+    return subscribeToLiveEvents(
+      ["record", "record-deleted"],
+      (record: WasteRecord, event) => {
+        const current = previousDetectionsRef.current
+        const isListed = current.some((detection) => detection.id === record.id)
+
+        if (event === "record-deleted") {
+          // Only the server knows which detection moves up to fill the gap
+          if (isListed) {
+            loadData(false)
+          }
+          return
+        }
+
+        if (!isListed) {
+          const newDetections = [record, ...current].slice(0, limit)
+          setDetections(newDetections)
+          previousDetectionsRef.current = newDetections
+        }
+      },
+      () => loadData(false),
+    )
   }, [limit])
 
   // Get the color for a waste type
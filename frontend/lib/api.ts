@@ -40,6 +40,14 @@ export interface PaginatedResponse<T> {
   current_page: number
 }
 
+// Define cursor-paginated response interface (keyset mode)
+export interface CursorPaginatedResponse<T> {
+  results: T[]
+  count: number | null
+  next: string | null
+  previous: string | null
+}
+
 // Helper function to handle API errors
 async function handleApiResponse(response: Response) {
   if (!response.ok) {
@@ -101,6 +109,43 @@ export async function fetchWasteRecords(filter: WasteRecordFilter = {}): Promise
   }
 }
 
+// Fetch waste records with keyset (cursor) pagination.
+// Pass the `next`/`previous` URL from a previous response to move between pages.
+export async function fetchWasteRecordsCursor(
+  filter: Omit<WasteRecordFilter, 'page'> & { count?: 'exact' | 'approximate' } = {},
+  pageUrl?: string,
+): Promise<CursorPaginatedResponse<WasteRecord>> {
+  try {
+    let url = pageUrl
+    if (!url) {
+      const params = new URLSearchParams({ pagination: 'cursor' })
+
+      if (filter.waste_types?.length) {
+        params.append('waste_types', filter.waste_types.join(','))
+      }
+      if (filter.start_date) {
+        params.append('start_date', filter.start_date)
+      }
+      if (filter.end_date) {
+        params.append('end_date', filter.end_date)
+      }
+      if (filter.limit) {
+        params.append('limit', filter.limit.toString())
+      }
+      if (filter.count) {
+        params.append('count', filter.count)
+      }
+
+      url = `${API_BASE_URL}/api/waste-records/?${params.toString()}`
+    }
+    const response = await fetch(url)
+    return await handleApiResponse(response)
+  } catch (error) {
+    console.error("Error fetching waste records:", error)
+    throw error
+  }
+}
+
 // Fetch simple waste records (for backward compatibility)
 export async function fetchSimpleWasteRecords(limit?: number): Promise<WasteRecord[]> {
   try {
@@ -161,10 +206,25 @@ export async function fetchWasteConfidence() {
   }
 }
 
+// Define time-series query interface for waste over time
+export interface WasteOverTimeQuery {
+  bucket?: 'hour' | 'day' | 'week'
+  start?: string
+  end?: string
+  tz?: string
+}
+
 // Fetch waste over time data
-export async function fetchWasteOverTime() {
+export async function fetchWasteOverTime(query: WasteOverTimeQuery = {}) {
   try {
-    const response = await fetch(`${API_BASE_URL}/api/waste-over-time/`)
+    const params = new URLSearchParams()
+    for (const [key, value] of Object.entries(query)) {
+      if (value) {
+        params.append(key, value)
+      }
+    }
+
+    const response = await fetch(`${API_BASE_URL}/api/waste-over-time/${params.toString() ? '?' + params.toString() : ''}`)
     return await handleApiResponse(response)
   } catch (error) {
     console.error("Error fetching waste over time:", error)
@@ -172,6 +232,96 @@ export async function fetchWasteOverTime() {
   }
 }
 
+// Live events pushed by the backend over Server-Sent Events.
+// All subscribers on the page share a single EventSource connection.
+export const LIVE_EVENTS = ['record', 'record-deleted', 'stats']
+
+// Payload of a "stats" event: deltas to add to the per-type totals
+export interface LiveStatsDelta {
+  type_id: number
+  label: string
+  count: number
+  confidence_sum: number
+}
+
+// Payload of a "record-deleted" event
+export interface LiveDeletedRecord {
+  id: number
+  type_id: number
+  type: string
+  timestamp: string
+}
+
+let liveEventSource: EventSource | null = null
+let liveEventSubscribers = 0
+const liveResyncHandlers = new Set<() => void>()
+
+function openLiveEventSource(): EventSource {
+  const source = new EventSource(`${API_BASE_URL}/api/live/`)
+  let lastEventId: number | null = null
+  let opened = false
+
+  const resync = () => liveResyncHandlers.forEach((handler) => handler())
+
+  // Events missed while disconnected are not replayed, so refetch after a reconnect
+  source.addEventListener('open', () => {
+    if (opened) {
+      lastEventId = null
+      resync()
+    }
+    opened = true
+  })
+
+  // Registered before any subscriber, so a gap triggers the refetch before the
+  // event itself is applied; the refetched state then replaces the local one
+  const track = (event: MessageEvent) => {
+    const id = Number(event.lastEventId)
+    if (lastEventId !== null && id !== lastEventId + 1) {
+      resync()
+    }
+    lastEventId = id
+  }
+  LIVE_EVENTS.forEach((name) => source.addEventListener(name, track))
+
+  return source
+}
+
+// Subscribe to pushed events. `handler` receives the event payload and name;
+// `onResync` is called when events may have been missed (reconnect or a gap in
+// the event ids) and the subscriber should refetch its data.
+export function subscribeToLiveEvents(
+  events: string[],
+  handler: (data: any, event: string) => void,
+  onResync?: () => void,
+): () => void {
+  if (typeof EventSource === 'undefined') {
+    return () => {}
+  }
+  if (!liveEventSource) {
+    liveEventSource = openLiveEventSource()
+  }
+  const source = liveEventSource
+  liveEventSubscribers += 1
+
+  const listener = (event: MessageEvent) => handler(JSON.parse(event.data), event.type)
+  events.forEach((name) => source.addEventListener(name, listener))
+  if (onResync) {
+    liveResyncHandlers.add(onResync)
+  }
+
+  return () => {
+    events.forEach((name) => source.removeEventListener(name, listener))
+    if (onResync) {
+      liveResyncHandlers.delete(onResync)
+    }
+    liveEventSubscribers -= 1
+    if (liveEventSubscribers === 0) {
+      source.close()
+      liveEventSource = null
+    }
+  }
+}
+
 // Fetch recent detections
 export async function fetchRecentDetections(limit = 5) {
   try {
@@ -1,3 +1,4 @@
+import os
 import torch
 
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -5,4 +6,17 @@ DATA_DIR = "data/dataset-resized"
 BATCH_SIZE = 32
 N_EPOCHS = 20
 IMG_SIZE = 224  # MobileNetV3 dùng ảnh 224x224
-NUM_CLASSES = 4
\ No newline at end of file
+NUM_CLASSES = 4
+CLASS_NAMES = ['glass', 'metal', 'paper', 'plastic']  # Thứ tự thư mục của ImageFolder
+
+# DataLoader
+NUM_WORKERS = min(4, os.cpu_count() or 1)
+PREFETCH_FACTOR = 2
+CACHE_DIR = "data/cache"  # Cache ảnh đã resize (uint8 memmap)
+
+# Chế độ cache đặc trưng: số biến thể augmentation cho mỗi ảnh train
+FEATURE_CACHE_DIR = "outputs/features"
+FEATURE_VARIANTS = 5
+
+# Checkpoint đầy đủ (model + optimizer + epoch + RNG) để train tiếp khi bị ngắt
+CHECKPOINT_PATH = "outputs/checkpoints/checkpoint.pth"
@@ -0,0 +1,58 @@
+import os
+import random
+
+import numpy as np
+import torch
+
+
+def rng_state():
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def save_checkpoint(path, model, optimizer, epoch, best_val_acc, scaler=None, extra=None):
+    """
+    Lưu đầy đủ trạng thái để train tiếp sau khi bị ngắt: trọng số, optimizer,
+    GradScaler, epoch đã xong, best accuracy và trạng thái RNG.
+    Ghi ra file tạm rồi đổi tên để không bao giờ để lại checkpoint hỏng.
+    """
+    state = {
+        "model": model.state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "epoch": epoch,
+        "best_val_acc": best_val_acc,
+        "rng": rng_state(),
+        "extra": extra or {},
+    }
+    if scaler is not None:
+        state["scaler"] = scaler.state_dict()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, model, optimizer, scaler=None):
+    """Khôi phục trạng thái, trả về (epoch bắt đầu, best accuracy, extra)."""
+    # RNG của numpy/python không phải tensor nên cần weights_only=False
+    state = torch.load(path, map_location="cpu", weights_only=False)
+    model.load_state_dict(state["model"])
+    optimizer.load_state_dict(state["optimizer"])
+    if scaler is not None and "scaler" in state:
+        scaler.load_state_dict(state["scaler"])
+    set_rng_state(state["rng"])
+    return state["epoch"] + 1, state["best_val_acc"], state["extra"]
@@ -1,27 +1,29 @@
 import torch
-from sklearn.metrics import accuracy_score
+
+from config.config import NUM_CLASSES, CLASS_NAMES
+from src.metrics import ClassificationMetrics, log_metrics
 
 def validate(model, val_loader, criterion, device, writer=None, epoch=0):
+    """
+    Đánh giá trên tập validation, trả về (loss, accuracy, metrics).
+
+    metrics gồm precision/recall/F1 theo từng lớp, macro F1, ECE và confusion
+    matrix; mọi thứ được cộng dồn trên device nên không có đồng bộ mỗi batch.
+    """
     model.eval()
-    val_loss = 0.0
-    y_true, y_pred = [], []
+    metrics = ClassificationMetrics(NUM_CLASSES, device)
 
-    with torch.no_grad():
+    with torch.inference_mode():
         for images, labels in val_loader:
-            images, labels = images.to(device), labels.to(device)
+            images = images.to(device, non_blocking=True)
+            labels = labels.to(device, non_blocking=True)
             outputs = model(images)
             loss = criterion(outputs, labels)
-            val_loss += loss.item()
-
-            _, predicted = torch.max(outputs, 1)
-            y_true.extend(labels.cpu().numpy())
-            y_pred.extend(predicted.cpu().numpy())
+            metrics.update(outputs, labels, loss)
 
-    acc = accuracy_score(y_true, y_pred)
-    loss_avg = val_loss / len(val_loader)
+    results = metrics.compute()
 
     if writer:
-        writer.add_scalar("Loss/val", loss_avg, epoch)
-        writer.add_scalar("Accuracy/val", acc, epoch)
+        log_metrics(writer, results, epoch, CLASS_NAMES)
 
-    return loss_avg, acc
+    return results["loss"], results["accuracy"], results
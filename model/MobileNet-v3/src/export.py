@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Subset
+
+from config.config import DATA_DIR, BATCH_SIZE, IMG_SIZE, NUM_CLASSES
+from src.mobileNetv3 import load_trained_model
+from utils.transforms import get_val_transform
+from utils.data import get_datasets
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Xuất checkpoint MobileNetV3 sang TorchScript / ONNX / int8 và so sánh")
+    parser.add_argument("--checkpoint", default="outputs/checkpoints/best_model.pth")
+    parser.add_argument("--output-dir", default="outputs/export")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--calib-batches", type=int, default=10,
+                        help="Số batch ảnh train dùng để hiệu chuẩn int8 tĩnh")
+    parser.add_argument("--eval-limit", type=int, default=None,
+                        help="Chỉ đánh giá trên N ảnh validation đầu tiên")
+    parser.add_argument("--backend", choices=["qnnpack", "x86", "fbgemm"], default="qnnpack",
+                        help="Engine lượng tử hóa: qnnpack cho ARM (Raspberry Pi), x86 cho PC")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--latency-runs", type=int, default=50)
+    parser.add_argument("--opset", type=int, default=17)
+    return parser.parse_args()
+
+
+def example_input():
+    return torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+
+
+def export_torchscript(model, path):
+    with torch.no_grad():
+        traced = torch.jit.freeze(torch.jit.trace(model, example_input()))
+    traced.save(path)
+    return path
+
+
+def export_onnx(model, path, opset):
+    # Trục batch động để có thể suy luận theo lô trên Pi
+    torch.onnx.export(
+        model, example_input(), path,
+        input_names=["input"], output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset, dynamo=False)
+    return path
+
+
+def quantize_dynamic(model):
+    # Lượng tử hóa động chỉ áp dụng cho các lớp Linear (phần classifier)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_static(model, calib_loader, backend, calib_batches):
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    prepared = prepare_fx(model, get_default_qconfig_mapping(backend), (example_input(),))
+    with torch.no_grad():
+        for i, (images, _) in enumerate(calib_loader):
+            if i >= calib_batches:
+                break
+            prepared(images)
+    return convert_fx(prepared)
+
+
+def load_runner(name, path):
+    """Trả về hàm nhận batch tensor NCHW và trả về logits tensor."""
+    if name == "onnx":
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            return None
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+        return lambda images: torch.from_numpy(
+            session.run(None, {input_name: images.numpy()})[0])
+
+    model = torch.jit.load(path, map_location="cpu")
+    model.eval()
+    return model
+
+
+def evaluate(runner, loader):
+    correct, total = 0, 0
+    with torch.inference_mode():
+        for images, labels in loader:
+            predicted = runner(images).argmax(dim=1)
+            correct += (predicted == labels).sum().item()
+            total += labels.numel()
+    return correct / total if total else 0.0
+
+
+def measure_latency(runner, runs):
+    # Độ trễ batch 1 (trường hợp một khung hình từ camera), bỏ qua vài lần chạy khởi động
+    image = example_input()
+    timings = []
+    with torch.inference_mode():
+        for _ in range(5):
+            runner(image)
+        for _ in range(runs):
+            start = time.perf_counter()
+            runner(image)
+            timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)), float(np.percentile(timings, 95))
+
+
+def print_report(results):
+    header = f"{'artifact':<16}{'size (MB)':>11}{'accuracy':>10}{'delta':>9}{'p50 (ms)':>10}{'p95 (ms)':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        accuracy = "-" if row["accuracy"] is None else f"{row['accuracy']:.4f}"
+        delta = "-" if row["accuracy_delta"] is None else f"{row['accuracy_delta']:+.4f}"
+        latency_p50 = "-" if row["latency_p50_ms"] is None else f"{row['latency_p50_ms']:.2f}"
+        latency_p95 = "-" if row["latency_p95_ms"] is None else f"{row['latency_p95_ms']:.2f}"
+        print(f"{row['name']:<16}{row['size_mb']:>11.2f}{accuracy:>10}{delta:>9}"
+              f"{latency_p50:>10}{latency_p95:>10}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    torch.set_num_threads(args.threads)
+    torch.backends.quantized.engine = args.backend
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    model = load_trained_model(args.checkpoint, NUM_CLASSES, device="cpu")
+
+    # Hiệu chuẩn trên tập train (không augmentation) để độ chính xác int8 đo
+    # trên validation không bị lạc quan do đã thấy chính các ảnh đó
+    calib_dataset, val_dataset = get_datasets(
+        args.data_dir, get_val_transform(IMG_SIZE), get_val_transform(IMG_SIZE))
+    calib_loader = DataLoader(calib_dataset, batch_size=BATCH_SIZE, shuffle=True,
+                              generator=torch.Generator().manual_seed(0))
+    eval_dataset = val_dataset
+    if args.eval_limit:
+        eval_dataset = Subset(val_dataset, range(min(args.eval_limit, len(val_dataset))))
+    eval_loader = DataLoader(eval_dataset, batch_size=BATCH_SIZE, shuffle=False)
+
+    def output_path(filename):
+        return os.path.join(args.output_dir, filename)
+
+    # Lưu fp32 state_dict để so sánh kích thước với các artifact khác
+    fp32_path = output_path("model_fp32.pth")
+    torch.save(model.state_dict(), fp32_path)
+
+    print("Xuất TorchScript fp32...")
+    artifacts = [("torchscript_fp32", export_torchscript(model, output_path("model_fp32.pt")))]
+
+    print("Xuất ONNX...")
+    artifacts.append(("onnx", export_onnx(model, output_path("model.onnx"), args.opset)))
+
+    print("Lượng tử hóa động int8...")
+    artifacts.append(("int8_dynamic", export_torchscript(
+        quantize_dynamic(model), output_path("model_int8_dynamic.pt"))))
+
+    print(f"Lượng tử hóa tĩnh int8 ({args.backend}, {args.calib_batches} batch hiệu chuẩn)...")
+    # FX làm thay đổi module nên lượng tử hóa trên một bản sao mới load lại
+    static_model = load_trained_model(args.checkpoint, NUM_CLASSES, device="cpu")
+    artifacts.append(("int8_static", export_torchscript(
+        quantize_static(static_model, calib_loader, args.backend, args.calib_batches),
+        output_path("model_int8_static.pt"))))
+
+    print("Đánh giá fp32 gốc...")
+    baseline_accuracy = evaluate(model, eval_loader)
+    latency_p50, latency_p95 = measure_latency(model, args.latency_runs)
+    results = [{
+        "name": "pytorch_fp32",
+        "path": fp32_path,
+        "size_mb": os.path.getsize(fp32_path) / 1e6,
+        "accuracy": baseline_accuracy,
+        "accuracy_delta": 0.0,
+        "latency_p50_ms": latency_p50,
+        "latency_p95_ms": latency_p95,
+    }]
+
+    for name, path in artifacts:
+        print(f"Đánh giá {name}...")
+        runner = load_runner(name, path)
+        row = {"name": name, "path": path, "size_mb": os.path.getsize(path) / 1e6,
+               "accuracy": None, "accuracy_delta": None,
+               "latency_p50_ms": None, "latency_p95_ms": None}
+        if runner is None:
+            print(f"  Bỏ qua đánh giá {name} (chưa cài onnxruntime)")
+        else:
+            row["accuracy"] = evaluate(runner, eval_loader)
+            row["accuracy_delta"] = row["accuracy"] - baseline_accuracy
+            row["latency_p50_ms"], row["latency_p95_ms"] = measure_latency(
+                runner, args.latency_runs)
+        results.append(row)
+
+    print()
+    print_report(results)
+
+    report_path = output_path("export_report.json")
+    with open(report_path, "w") as f:
+        json.dump({
+            "checkpoint": args.checkpoint,
+            "quantized_engine": args.backend,
+            "threads": args.threads,
+            "eval_images": len(eval_dataset),
+            "calib_batches": args.calib_batches,
+            "artifacts": results,
+        }, f, indent=2)
+    print(f"\nĐã lưu báo cáo: {report_path}")
@@ -0,0 +1,128 @@
+import json
+import os
+
+import numpy as np
+import torch
+from tqdm import tqdm
+
+from config.config import NUM_CLASSES, CLASS_NAMES
+from src.metrics import ClassificationMetrics, log_metrics, format_per_class
+from utils.data import make_loader
+
+
+def backbone_features(model, images):
+    # Phần backbone bị đóng băng: features -> avgpool -> flatten (960 chiều)
+    return torch.flatten(model.avgpool(model.features(images)), 1)
+
+
+def build_feature_cache(model, dataset, cache_path, variants, batch_size, device,
+                        num_workers=0, seed=0, meta=None):
+    """
+    Chạy backbone đóng băng một lần cho mỗi (ảnh, biến thể augmentation) và lưu
+    đặc trưng vào memmap float16 kích thước (variants, N, D).
+
+    Với tập train, mỗi biến thể là một lần duyệt dataset với transform ngẫu
+    nhiên (seed cố định); tập val chỉ cần 1 biến thể. Cache chỉ được build lại
+    khi meta (số ảnh, số biến thể, trọng số backbone, ...) thay đổi.
+    Trả về (features, labels) dạng tensor trên CPU.
+    """
+    meta = dict(meta or {}, samples=len(dataset), variants=variants, seed=seed)
+    meta_path = cache_path + ".json"
+    labels_path = cache_path + ".labels.npy"
+
+    if os.path.exists(meta_path) and os.path.exists(labels_path):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                features = np.load(cache_path, mmap_mode="r")
+                return torch.from_numpy(np.array(features)), torch.from_numpy(np.load(labels_path))
+
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    model.eval()
+    features = None
+    labels = np.empty(len(dataset), dtype=np.int64)
+    # fork_rng: seed cố định cho augmentation mà không làm lệch RNG của quá trình train
+    with torch.random.fork_rng(devices=[]):
+        for variant in range(variants):
+            torch.manual_seed(seed + variant)
+            loader = make_loader(dataset, batch_size, shuffle=False, num_workers=num_workers,
+                                 persistent_workers=False)
+            offset = 0
+            with torch.inference_mode():
+                for images, targets in tqdm(loader, ncols=100,
+                                            desc=f"Trích đặc trưng {variant + 1}/{variants}"):
+                    batch = backbone_features(model, images.to(device)).cpu().numpy()
+                    if features is None:
+                        features = np.lib.format.open_memmap(
+                            cache_path, mode="w+", dtype=np.float16,
+                            shape=(variants, len(dataset), batch.shape[1]))
+                    features[variant, offset:offset + len(batch)] = batch
+                    labels[offset:offset + len(batch)] = targets.numpy()
+                    offset += len(batch)
+    features.flush()
+    np.save(labels_path, labels)
+    # Ghi meta sau cùng để cache dở dang luôn bị build lại
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return torch.from_numpy(np.array(features)), torch.from_numpy(labels)
+
+
+def iterate_features(features, labels, batch_size, shuffle, generator=None):
+    """Chia batch trực tiếp trên tensor, mỗi ảnh lấy ngẫu nhiên một biến thể."""
+    variants, count = features.shape[:2]
+    device = features.device
+    if shuffle:
+        order = torch.randperm(count, generator=generator).to(device)
+        variant = torch.randint(variants, (count,), generator=generator).to(device)
+    else:
+        order = torch.arange(count, device=device)
+        variant = torch.zeros(count, dtype=torch.long, device=device)
+    for start in range(0, count, batch_size):
+        index = order[start:start + batch_size]
+        yield features[variant[start:start + batch_size], index].float(), labels[index]
+
+
+def train_head(model, train_data, val_data, criterion, optimizer, n_epochs, batch_size,
+               device, tensorboard, save_model, start_epoch=0, best_val_acc=0.0,
+               end_epoch=None):
+    """Huấn luyện riêng classifier trên đặc trưng đã cache (không chạy lại backbone)."""
+    train_features, train_labels = (t.to(device) for t in train_data)
+    val_features, val_labels = (t.to(device) for t in val_data)
+
+    for epoch in range(start_epoch, n_epochs):
+        model.classifier.train()
+        loss_sum = torch.zeros((), device=device)
+        correct = torch.zeros((), device=device, dtype=torch.long)
+        for features, labels in iterate_features(
+                train_features, train_labels, batch_size, True):
+            optimizer.zero_grad()
+            outputs = model.classifier(features)
+            loss = criterion(outputs, labels)
+            loss.backward()
+            optimizer.step()
+            loss_sum += loss.detach() * len(labels)
+            correct += (outputs.argmax(dim=1) == labels).sum()
+        train_loss = loss_sum.item() / len(train_labels)
+        train_acc = correct.item() / len(train_labels)
+
+        model.classifier.eval()
+        metrics = ClassificationMetrics(NUM_CLASSES, device)
+        with torch.inference_mode():
+            for features, labels in iterate_features(
+                    val_features, val_labels, batch_size, False):
+                outputs = model.classifier(features)
+                metrics.update(outputs, labels, criterion(outputs, labels))
+        val_metrics = metrics.compute()
+
+        tensorboard.add_scalar("Loss/train", train_loss, epoch)
+        tensorboard.add_scalar("Accuracy/train", train_acc, epoch)
+        log_metrics(tensorboard, val_metrics, epoch, CLASS_NAMES)
+        print(f"Epoch {epoch + 1}/{n_epochs}")
+        print(f"[Train] Loss: {train_loss:.4f} | Accuracy: {train_acc:.4f}")
+        print(f"[Validation] Loss: {val_metrics['loss']:.4f} | Accuracy: {val_metrics['accuracy']:.4f} | "
+              f"Macro F1: {val_metrics['macro_f1']:.4f} | ECE: {val_metrics['ece']:.4f}")
+        print(format_per_class(val_metrics, CLASS_NAMES))
+        # Lưu cả mô hình (backbone không đổi) để checkpoint dùng được như bình thường
+        best_val_acc = save_model(val_metrics["accuracy"], model, best_val_acc)
+        if end_epoch:
+            end_epoch(epoch, best_val_acc)
+    return best_val_acc
@@ -0,0 +1,85 @@
+import torch
+
+
+class ClassificationMetrics:
+    """
+    Cộng dồn metric phân loại ngay trên device, không đồng bộ về CPU mỗi batch.
+
+    Mỗi batch chỉ cập nhật vài tensor nhỏ: confusion matrix (num_classes x
+    num_classes), tổng loss và các bin độ tin cậy cho ECE. compute() mới
+    chuyển kết quả về CPU một lần.
+    """
+
+    def __init__(self, num_classes, device, n_bins=15):
+        self.num_classes = num_classes
+        self.n_bins = n_bins
+        self.confusion = torch.zeros(num_classes, num_classes, dtype=torch.long, device=device)
+        self.loss_sum = torch.zeros((), dtype=torch.float32, device=device)
+        # Theo từng bin độ tin cậy: tổng độ tin cậy và số dự đoán đúng
+        self.bin_confidence = torch.zeros(n_bins, dtype=torch.float32, device=device)
+        self.bin_correct = torch.zeros(n_bins, dtype=torch.long, device=device)
+
+    def update(self, logits, labels, loss=None):
+        """loss là loss trung bình của batch (như CrossEntropyLoss mặc định)."""
+        logits = logits.detach().float()
+        confidence, predicted = torch.softmax(logits, dim=1).max(dim=1)
+        self.confusion += torch.bincount(
+            labels * self.num_classes + predicted,
+            minlength=self.num_classes ** 2).view(self.num_classes, self.num_classes)
+
+        bins = (confidence * self.n_bins).long().clamp_(max=self.n_bins - 1)
+        self.bin_confidence.index_add_(0, bins, confidence)
+        self.bin_correct.index_add_(0, bins, (predicted == labels).long())
+
+        if loss is not None:
+            self.loss_sum += loss.detach().float() * len(labels)
+
+    def compute(self):
+        confusion = self.confusion.cpu().double()
+        total = confusion.sum()
+        true_positive = confusion.diag()
+        # Hàng = nhãn thật, cột = dự đoán
+        precision = true_positive / confusion.sum(dim=0).clamp(min=1)
+        recall = true_positive / confusion.sum(dim=1).clamp(min=1)
+        f1 = 2 * precision * recall / (precision + recall).clamp(min=1e-12)
+
+        bin_gap = (self.bin_confidence.cpu() - self.bin_correct.cpu().double()).abs()
+        ece = (bin_gap.sum() / total).item() if total else 0.0
+
+        return {
+            "loss": (self.loss_sum.item() / total.item()) if total else 0.0,
+            "accuracy": (true_positive.sum() / total).item() if total else 0.0,
+            "precision": precision.tolist(),
+            "recall": recall.tolist(),
+            "f1": f1.tolist(),
+            "macro_f1": f1.mean().item(),
+            "ece": ece,
+            "confusion_matrix": self.confusion.cpu().tolist(),
+        }
+
+
+def log_metrics(writer, metrics, epoch, class_names, prefix="val"):
+    """Ghi metric tổng và theo từng lớp vào TensorBoard."""
+    writer.add_scalar(f"Loss/{prefix}", metrics["loss"], epoch)
+    writer.add_scalar(f"Accuracy/{prefix}", metrics["accuracy"], epoch)
+    writer.add_scalar(f"F1/{prefix}_macro", metrics["macro_f1"], epoch)
+    writer.add_scalar(f"Calibration/{prefix}_ece", metrics["ece"], epoch)
+    for name, precision, recall, f1 in zip(
+            class_names, metrics["precision"], metrics["recall"], metrics["f1"]):
+        writer.add_scalar(f"Precision/{prefix}_{name}", precision, epoch)
+        writer.add_scalar(f"Recall/{prefix}_{name}", recall, epoch)
+        writer.add_scalar(f"F1/{prefix}_{name}", f1, epoch)
+    # Confusion matrix dạng bảng markdown trong tab Text
+    header = "| thật \\ dự đoán | " + " | ".join(class_names) + " |"
+    lines = [header, "|" + "---|" * (len(class_names) + 1)]
+    for name, row in zip(class_names, metrics["confusion_matrix"]):
+        lines.append(f"| {name} | " + " | ".join(str(v) for v in row) + " |")
+    writer.add_text(f"ConfusionMatrix/{prefix}", "\n".join(lines), epoch)
+
+
+def format_per_class(metrics, class_names):
+    lines = [f"{'lớp':<10}{'precision':>10}{'recall':>10}{'f1':>10}"]
+    for name, precision, recall, f1 in zip(
+            class_names, metrics["precision"], metrics["recall"], metrics["f1"]):
+        lines.append(f"{name:<10}{precision:>10.4f}{recall:>10.4f}{f1:>10.4f}")
+    return "\n".join(lines)
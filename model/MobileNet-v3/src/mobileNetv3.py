@@ -1,7 +1,7 @@
 import torch
 from torchvision import models
 
-def get_model(num_classes, device):
+def get_model(num_classes, device, freeze_backbone=True):
     model = models.mobilenet_v3_large(weights=models.MobileNet_V3_Large_Weights.DEFAULT)
 
     for param in model.features.parameters():
@@ -12,13 +12,28 @@ def get_model(num_classes, device):
         if 'classifier.0' in name or 'classifier.3' in name:
             param.requires_grad = True
         else:
-            param.requires_grad = False
+            param.requires_grad = not freeze_backbone
 
     model = model.to(device)
     criterion = torch.nn.CrossEntropyLoss()
-    optimizer = torch.optim.Adam(model.classifier.parameters(), lr=0.001)
+    if freeze_backbone:
+        optimizer = torch.optim.Adam(model.classifier.parameters(), lr=0.001)
+    else:
+        # Fine-tune toàn bộ: backbone học chậm hơn để không phá trọng số pretrained
+        optimizer = torch.optim.Adam([
+            {"params": model.features.parameters(), "lr": 0.0001},
+            {"params": model.classifier.parameters(), "lr": 0.001},
+        ])
 
     return model, criterion, optimizer
 
-model = models.mobilenet_v3_large(weights=models.MobileNet_V3_Large_Weights.DEFAULT)
-print(model)
\ No newline at end of file
+def load_trained_model(checkpoint_path, num_classes, device="cpu"):
+    # Tạo lại kiến trúc giống lúc training rồi load trọng số đã fine-tune
+    model = models.mobilenet_v3_large(weights=None)
+    model.classifier[3] = torch.nn.Linear(model.classifier[3].in_features, num_classes)
+    model.load_state_dict(torch.load(checkpoint_path, map_location=device))
+    return model.to(device).eval()
+
+if __name__ == "__main__":
+    model = models.mobilenet_v3_large(weights=models.MobileNet_V3_Large_Weights.DEFAULT)
+    print(model)
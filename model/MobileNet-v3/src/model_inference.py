@@ -1,38 +1,121 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import torch
-from torchvision import models, transforms
 from PIL import Image
-from config.config import DEVICE, DATA_DIR, BATCH_SIZE, N_EPOCHS, IMG_SIZE, NUM_CLASSES
 
-class_names = ['glass', 'metal', 'paper', 'plastic']
+from config.config import DEVICE, BATCH_SIZE, IMG_SIZE, NUM_CLASSES, CLASS_NAMES
+from src.mobileNetv3 import load_trained_model
+from utils.transforms import get_val_transform
 
-# Tạo lại kiến trúc giống lúc training
-model = models.mobilenet_v3_large(weights=None)  
+class_names = CLASS_NAMES
 
-# Sửa số lớp output đúng với số lớp của bài toán của bạn
-model.classifier[3] = torch.nn.Linear(model.classifier[3].in_features, NUM_CLASSES)  
+DEFAULT_CHECKPOINT = "outputs/checkpoints/best_model.pth"
 
-# Load trọng số đã fine-tune
-model.load_state_dict(torch.load("D:/DaiHoc/Nam_3/HK2/Code/MobileNet-v3/outputs/checkpoints/best_model.pth", map_location='cpu'))
-model.eval()
 
-transform = transforms.Compose([
-    transforms.Resize((IMG_SIZE, IMG_SIZE)),
-    transforms.ToTensor(),
-    transforms.Normalize(
-        mean=[0.485, 0.456, 0.406], 
-        std=[0.229, 0.224, 0.225]
-        )
-    ])
+class WasteClassifier:
+    """
+    Phân loại rác theo lô với MobileNetV3 đã fine-tune.
 
-def classify_image(image_path):
-    image = Image.open(image_path).convert("RGB")
-    input_tensor = transform(image).unsqueeze(0)
+    Mô hình chỉ được load ở lần phân loại đầu tiên. Ảnh được giải mã và
+    biến đổi trong thread pool, batch kế tiếp được chuẩn bị trong lúc batch
+    hiện tại đang chạy qua mô hình.
+    """
+
+    def __init__(self, checkpoint_path=DEFAULT_CHECKPOINT, device=DEVICE,
+                 batch_size=BATCH_SIZE, num_workers=4, channels_last=True):
+        self.checkpoint_path = checkpoint_path
+        self.device = torch.device(device)
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.channels_last = channels_last
+        self.class_names = class_names
+        self.transform = get_val_transform(IMG_SIZE)
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    model = load_trained_model(self.checkpoint_path, NUM_CLASSES, self.device)
+                    if self.channels_last:
+                        model = model.to(memory_format=torch.channels_last)
+                    self._model = model
+        return self._model
+
+    def prepare(self, image):
+        # Nhận đường dẫn, PIL Image hoặc mảng RGB uint8 (H, W, 3)
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        elif not isinstance(image, Image.Image):
+            with Image.open(image) as f:
+                image = f.convert("RGB")
+        return self.transform(image.convert("RGB"))
+
+    def forward(self, tensors):
+        batch = torch.stack(tensors).to(self.device, non_blocking=True)
+        if self.channels_last:
+            batch = batch.contiguous(memory_format=torch.channels_last)
+        with torch.inference_mode():
+            return torch.softmax(self.model(batch), dim=1).cpu()
+
+    def classify_batch(self, images, batch_size=None):
+        """
+        Phân loại danh sách ảnh (đường dẫn / PIL Image / mảng RGB).
+
+        Trả về list dict theo đúng thứ tự đầu vào, mỗi dict gồm label,
+        class_index, confidence và probabilities (xác suất của mọi lớp,
+        theo thứ tự class_names).
+        """
+        images = list(images)
+        batch_size = batch_size or self.batch_size
+        chunks = [images[i:i + batch_size] for i in range(0, len(images), batch_size)]
+        results = []
+        if not chunks:
+            return results
 
-    with torch.no_grad():
-        output = model(input_tensor)
-        predicted_class = torch.argmax(output, dim=1).item()
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            pending = [executor.submit(self.prepare, image) for image in chunks[0]]
+            for index in range(len(chunks)):
+                tensors = [future.result() for future in pending]
+                # Giải mã batch sau song song với forward batch hiện tại
+                if index + 1 < len(chunks):
+                    pending = [executor.submit(self.prepare, image) for image in chunks[index + 1]]
+                probabilities = self.forward(tensors)
+                confidences, predicted = probabilities.max(dim=1)
+                for probs, confidence, class_index in zip(
+                        probabilities.tolist(), confidences.tolist(), predicted.tolist()):
+                    results.append({
+                        "label": self.class_names[class_index],
+                        "class_index": class_index,
+                        "confidence": confidence,
+                        "probabilities": probs,
+                    })
+        return results
+
+    def classify_image(self, image):
+        return self.classify_batch([image])[0]["label"]
+
+
+_default_classifier = None
+
+
+def get_classifier():
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = WasteClassifier()
+    return _default_classifier
+
+
+def classify_image(image_path):
+    return get_classifier().classify_image(image_path)
 
-    return class_names[predicted_class]
 
-result = classify_image(r"D:\DaiHoc\Nam_3\HK2\Code\MobileNet-v3\test\glass.jpg")
-print(f"Predicted class: {result}")
\ No newline at end of file
+if __name__ == "__main__":
+    # python -m src.model_inference test/glass.jpg test/metal.jpg ...
+    for path, result in zip(sys.argv[1:], get_classifier().classify_batch(sys.argv[1:])):
+        print(f"{path}: {result['label']} ({result['confidence']:.2%})")
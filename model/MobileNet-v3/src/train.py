@@ -1,57 +1,73 @@
+import argparse
 import torch
 import os
-from torch.utils.data import DataLoader, Subset
-from torchvision.datasets import ImageFolder
 from torch.utils.tensorboard import SummaryWriter
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import train_test_split
 from tqdm import tqdm
 from datetime import datetime
+from torchvision.models import MobileNet_V3_Large_Weights
 
-from config.config import DEVICE, DATA_DIR, BATCH_SIZE, N_EPOCHS, IMG_SIZE, NUM_CLASSES
+from config.config import (DEVICE, DATA_DIR, BATCH_SIZE, N_EPOCHS, IMG_SIZE, NUM_CLASSES,
+                           NUM_WORKERS, PREFETCH_FACTOR, CACHE_DIR,
+                           FEATURE_CACHE_DIR, FEATURE_VARIANTS, CHECKPOINT_PATH, CLASS_NAMES)
 from src.mobileNetv3 import get_model
-from utils.transforms import get_train_transform, get_val_transform
+from src.feature_cache import build_feature_cache, train_head
+from src.checkpoint import save_checkpoint, load_checkpoint
+from utils.transforms import (get_train_transform, get_val_transform,
+                              get_train_tensor_transform, get_val_tensor_transform)
 from utils.visualization import show_augmented_images
+from utils.data import get_datasets, make_loader, dataset_fingerprint
 from src.evaluate import validate
+from src.metrics import format_per_class
 
 
-def train_step(model, train_loader, criterion, optimizer, device, epoch, tensorboard):
+def autocast(device, amp_dtype):
+    # amp_dtype None = fp32; bf16 chạy được cả trên CPU, fp16 chỉ dùng với CUDA
+    return torch.autocast(device_type=device.type, dtype=amp_dtype,
+                          enabled=amp_dtype is not None)
+
+
+def train_step(model, train_loader, criterion, optimizer, device, epoch, tensorboard,
+               n_epochs=N_EPOCHS, amp_dtype=None, scaler=None, log_every=10):
     # Train
     model.train()
-    running_loss = 0.0
-    running_acc = 0.0
-    y_train_true, y_train_pred = [], []
+    # Cộng dồn loss/số dự đoán đúng ngay trên device, chỉ đồng bộ về CPU
+    # mỗi log_every batch để cập nhật progress bar
+    loss_sum = torch.zeros((), device=device)
+    correct = torch.zeros((), dtype=torch.long, device=device)
+    seen = 0
 
     progress_bar = tqdm(train_loader, colour="green", ncols=100)
 
     for iter, (images, labels) in enumerate(progress_bar):
 
-        images, labels = images.to(device), labels.to(device)
+        images = images.to(device, non_blocking=True)
+        labels = labels.to(device, non_blocking=True)
 
-        optimizer.zero_grad()
-        outputs = model(images)
-        loss = criterion(outputs, labels)
+        optimizer.zero_grad(set_to_none=True)
+        with autocast(device, amp_dtype):
+            outputs = model(images)
+            loss = criterion(outputs, labels)
 
-        loss.backward()
-        optimizer.step()
+        if scaler is not None:
+            scaler.scale(loss).backward()
+            scaler.step(optimizer)
+            scaler.update()
+        else:
+            loss.backward()
+            optimizer.step()
 
-        running_loss += loss.item()
-        _, predicted = torch.max(outputs, 1)
-        
-        batch_acc = (predicted == labels).sum().item() / len(labels) 
-        running_acc += batch_acc
-        # Cập nhật progress bar
-        progress_bar.set_description("Epoch {}/{} | Iteration {}/{} ".format(
-            epoch + 1, N_EPOCHS, iter+1, len(train_loader)))
-        progress_bar.set_postfix(loss=running_loss/(iter+1), acc=running_acc/(iter+1))
-        
-        
-        y_train_true.extend(labels.cpu().numpy())
-        y_train_pred.extend(predicted.cpu().numpy())
+        loss_sum += loss.detach() * len(labels)
+        correct += (outputs.argmax(dim=1) == labels).sum()
+        seen += len(labels)
 
+        # Cập nhật progress bar
+        if (iter + 1) % log_every == 0 or iter + 1 == len(train_loader):
+            progress_bar.set_description("Epoch {}/{} | Iteration {}/{} ".format(
+                epoch + 1, n_epochs, iter+1, len(train_loader)))
+            progress_bar.set_postfix(loss=loss_sum.item() / seen, acc=correct.item() / seen)
 
-    train_accuracy = accuracy_score(y_train_true, y_train_pred) 
-    train_loss = running_loss / len(train_loader)   
+    train_loss = loss_sum.item() / seen
+    train_accuracy = correct.item() / seen
 
     tensorboard.add_scalar("Loss/train", train_loss, epoch)
     tensorboard.add_scalar("Accuracy/train", train_accuracy, epoch)
@@ -71,48 +87,126 @@ def save_model(val_acc, model, best_val_acc):
     return best_val_acc
 
 # Huấn luyện mô hình
-def train_model(n_epochs, model, train_loader, val_loader, criterion, optimizer, DEVICE, tensorboard):
-    best_val_acc = 0.0
-    for epoch in range(n_epochs):
+def train_model(n_epochs, model, train_loader, val_loader, criterion, optimizer, DEVICE, tensorboard,
+                amp_dtype=None, scaler=None, compile_model=False, start_epoch=0,
+                best_val_acc=0.0, end_epoch=None):
+    # torch.compile chỉ dùng cho forward/backward; checkpoint vẫn lưu từ model gốc
+    # để tên tham số không có tiền tố _orig_mod
+    runner = torch.compile(model) if compile_model else model
+    for epoch in range(start_epoch, n_epochs):
         # Train
-        train_loss, train_acc = train_step(model, train_loader, criterion, optimizer, DEVICE, epoch, tensorboard)
+        train_loss, train_acc = train_step(runner, train_loader, criterion, optimizer, DEVICE, epoch,
+                                           tensorboard, n_epochs, amp_dtype, scaler)
         # Validation
-        val_loss, val_acc = validate(model, val_loader, criterion, DEVICE, tensorboard, epoch)
+        with autocast(DEVICE, amp_dtype):
+            val_loss, val_acc, val_metrics = validate(runner, val_loader, criterion, DEVICE,
+                                                      tensorboard, epoch)
         print(f"[Train] Loss: {train_loss:.4f} | Accuracy: {train_acc:.4f}")
-        print(f"[Validation] Loss: {val_loss:.4f} | Accuracy: {val_acc:.4f}")
+        print(f"[Validation] Loss: {val_loss:.4f} | Accuracy: {val_acc:.4f} | "
+              f"Macro F1: {val_metrics['macro_f1']:.4f} | ECE: {val_metrics['ece']:.4f}")
+        print(format_per_class(val_metrics, CLASS_NAMES))
         # Lưu mô hình tốt nhất (dựa trên độ chính xác trên tập validation)
         best_val_acc = save_model(val_acc, model, best_val_acc)
+        if end_epoch:
+            end_epoch(epoch, best_val_acc)
+    return best_val_acc
 
-if __name__ == "__main__":
-
-    # Tạo 2 transform riêng
-    train_transform = get_train_transform(IMG_SIZE)
-    val_transform = get_val_transform(IMG_SIZE)
-
-    # Tạo dataset 2 lần (1 lần cho train, 1 lần cho val)
-    full_dataset_train = ImageFolder(root=DATA_DIR, transform=train_transform)
-    full_dataset_val = ImageFolder(root=DATA_DIR, transform=val_transform)
-
-    # Chia chỉ số ảnh
-    indices = list(range(len(full_dataset_train)))
-    labels = full_dataset_train.targets
-
-    train_idx, val_idx = train_test_split(
-        indices, test_size=0.3, stratify=labels, random_state=42)
-
-    # Tạo Subset với transform tương ứng
-    train_dataset = Subset(full_dataset_train, train_idx)
-    val_dataset = Subset(full_dataset_val, val_idx)
-
-    # Tạo DataLoader
-    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Huấn luyện MobileNetV3 phân loại rác")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS,
+                        help="Số worker của DataLoader (0 = đọc ảnh trên luồng chính)")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH_FACTOR,
+                        help="Số batch mỗi worker chuẩn bị trước")
+    parser.add_argument("--cache", action="store_true",
+                        help="Giải mã + resize ảnh một lần vào cache memmap, augment trên tensor")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--mode", choices=["head", "cached", "full"], default="head",
+                        help="head: backbone đóng băng, chạy lại mỗi epoch; "
+                             "cached: train classifier trên đặc trưng backbone đã cache; "
+                             "full: fine-tune toàn bộ mô hình")
+    parser.add_argument("--feature-variants", type=int, default=FEATURE_VARIANTS,
+                        help="Số biến thể augmentation được cache cho mỗi ảnh train")
+    parser.add_argument("--feature-cache-dir", default=FEATURE_CACHE_DIR)
+    parser.add_argument("--epochs", type=int, default=N_EPOCHS)
+    parser.add_argument("--lr", type=float, help="Learning rate của classifier")
+    parser.add_argument("--amp", choices=["bf16", "fp16"],
+                        help="Mixed precision: bf16 (CPU/GPU mới) hoặc fp16 (CUDA)")
+    parser.add_argument("--compile", action="store_true", help="Dùng torch.compile")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH,
+                        help="Checkpoint đầy đủ, ghi lại sau mỗi epoch")
+    parser.add_argument("--resume", action="store_true",
+                        help="Train tiếp từ --checkpoint nếu file tồn tại")
+    args = parser.parse_args()
+    if args.amp == "fp16" and DEVICE.type != "cuda":
+        parser.error("--amp fp16 chỉ hỗ trợ CUDA, trên CPU hãy dùng bf16")
+    return args
 
 
-    model, criterion, optimizer = get_model(NUM_CLASSES, DEVICE)
-    logdir = f"runs/train_{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+if __name__ == "__main__":
+    args = parse_args()
+
+    # Với cache, ảnh đã resize sẵn nên transform làm việc trên tensor uint8
+    if args.cache:
+        train_transform = get_train_tensor_transform(IMG_SIZE)
+        val_transform = get_val_tensor_transform()
+    else:
+        train_transform = get_train_transform(IMG_SIZE)
+        val_transform = get_val_transform(IMG_SIZE)
+
+    # Quét DATA_DIR một lần, train/val dùng chung danh sách ảnh với transform riêng
+    train_dataset, val_dataset = get_datasets(
+        DATA_DIR, train_transform, val_transform,
+        cache_dir=args.cache_dir if args.cache else None, img_size=IMG_SIZE)
+
+    model, criterion, optimizer = get_model(NUM_CLASSES, DEVICE,
+                                            freeze_backbone=args.mode != "full")
+    if args.lr:
+        optimizer.param_groups[-1]["lr"] = args.lr
+    amp_dtype = {"bf16": torch.bfloat16, "fp16": torch.float16}.get(args.amp)
+    scaler = torch.amp.GradScaler("cuda") if args.amp == "fp16" else None
+
+    start_epoch, best_val_acc, logdir = 0, 0.0, None
+    if args.resume and os.path.exists(args.checkpoint):
+        start_epoch, best_val_acc, extra = load_checkpoint(
+            args.checkpoint, model, optimizer, scaler)
+        if extra.get("mode") != args.mode:
+            raise SystemExit(f"Checkpoint được tạo với --mode {extra.get('mode')}, "
+                             f"không thể train tiếp với --mode {args.mode}")
+        # Ghi tiếp vào cùng thư mục TensorBoard của lần chạy trước
+        logdir = extra.get("logdir")
+        print(f"Train tiếp từ epoch {start_epoch + 1} (best accuracy {best_val_acc:.4f})")
+    logdir = logdir or f"runs/train_{datetime.now().strftime('%Y%m%d-%H%M%S')}"
     tensorboard = SummaryWriter(log_dir=logdir)
     os.makedirs("outputs/checkpoints", exist_ok=True)
 
-
-    train_model(N_EPOCHS, model, train_loader, val_loader, criterion, optimizer, DEVICE, tensorboard)
\ No newline at end of file
+    def end_epoch(epoch, best_val_acc):
+        save_checkpoint(args.checkpoint, model, optimizer, epoch, best_val_acc, scaler,
+                        extra={"mode": args.mode, "logdir": logdir})
+
+    if args.mode == "cached":
+        # Backbone chỉ chạy một lần cho mỗi (ảnh, biến thể), các lần train sau dùng lại cache
+        meta = {"data": dataset_fingerprint(DATA_DIR), "img_size": IMG_SIZE,
+                "weights": str(MobileNet_V3_Large_Weights.DEFAULT)}
+        cache_options = {"batch_size": BATCH_SIZE, "device": DEVICE, "num_workers": args.workers}
+        train_data = build_feature_cache(
+            model, train_dataset, os.path.join(args.feature_cache_dir, "train.npy"),
+            args.feature_variants, meta=meta, **cache_options)
+        val_data = build_feature_cache(
+            model, val_dataset, os.path.join(args.feature_cache_dir, "val.npy"),
+            1, meta=meta, **cache_options)
+        train_head(model, train_data, val_data, criterion, optimizer, args.epochs,
+                   BATCH_SIZE, DEVICE, tensorboard, save_model,
+                   start_epoch=start_epoch, best_val_acc=best_val_acc, end_epoch=end_epoch)
+    else:
+        # Tạo DataLoader
+        loader_options = {
+            "num_workers": args.workers,
+            "prefetch_factor": args.prefetch,
+            "pin_memory": DEVICE.type == "cuda",
+        }
+        train_loader = make_loader(train_dataset, BATCH_SIZE, shuffle=True, **loader_options)
+        val_loader = make_loader(val_dataset, BATCH_SIZE, shuffle=False, **loader_options)
+
+        train_model(args.epochs, model, train_loader, val_loader, criterion, optimizer, DEVICE,
+                    tensorboard, amp_dtype=amp_dtype, scaler=scaler, compile_model=args.compile,
+                    start_epoch=start_epoch, best_val_acc=best_val_acc, end_epoch=end_epoch)
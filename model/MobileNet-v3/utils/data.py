@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from PIL import Image
+from torch.utils.data import DataLoader, Dataset
+from torchvision.datasets import ImageFolder
+from sklearn.model_selection import train_test_split
+
+
+def split_indices(targets, test_size=0.3, random_state=42):
+    # Chia train/val phân tầng theo nhãn, cố định seed để các bước sau
+    # (export, benchmark, ...) dùng lại đúng tập validation lúc train
+    indices = list(range(len(targets)))
+    return train_test_split(
+        indices, test_size=test_size, stratify=targets, random_state=random_state)
+
+
+def dataset_fingerprint(data_dir):
+    # Đổi khi thêm/xóa/sửa ảnh trong DATA_DIR (chỉ dùng stat, không đọc ảnh)
+    digest = hashlib.md5()
+    # followlinks giống ImageFolder, để thư mục lớp là symlink vẫn được tính
+    for root, _, files in sorted(os.walk(data_dir, followlinks=True)):
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            digest.update(f"{os.path.relpath(os.path.join(root, name), data_dir)}"
+                          f"|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+class TransformSubset(Dataset):
+    """Subset có transform riêng, để train/val dùng chung một ImageFolder."""
+
+    def __init__(self, dataset, indices, transform):
+        self.dataset = dataset
+        self.indices = indices
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        image, label = self.dataset[self.indices[index]]
+        return self.transform(image), label
+
+
+def _load_resized(path, img_size):
+    with Image.open(path) as image:
+        image = image.convert("RGB").resize((img_size, img_size), Image.BILINEAR)
+    # HWC -> CHW để các transform của torchvision dùng trực tiếp trên tensor
+    return np.asarray(image).transpose(2, 0, 1)
+
+
+def build_image_cache(data_dir, cache_dir, img_size, num_workers=8):
+    """
+    Giải mã + resize toàn bộ ảnh trong DATA_DIR một lần, lưu thành mảng uint8
+    (N, 3, H, W) dạng memmap. Build lại khi danh sách ảnh thay đổi hoặc khi
+    ảnh bị sửa/thay thế mà vẫn giữ tên (so fingerprint của DATA_DIR).
+    Trả về (đường dẫn file ảnh, nhãn, danh sách lớp).
+    """
+    dataset = ImageFolder(root=data_dir)
+    samples = [os.path.relpath(path, data_dir) for path, _ in dataset.samples]
+    images_path = os.path.join(cache_dir, f"images_{img_size}.npy")
+    meta_path = os.path.join(cache_dir, f"meta_{img_size}.json")
+    meta = {"classes": dataset.classes, "samples": samples, "targets": dataset.targets,
+            "fingerprint": dataset_fingerprint(data_dir)}
+
+    if os.path.exists(images_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return images_path, np.array(dataset.targets), dataset.classes
+
+    print(f"Tạo cache ảnh {img_size}x{img_size} cho {len(samples)} ảnh tại {cache_dir}...")
+    os.makedirs(cache_dir, exist_ok=True)
+    images = np.lib.format.open_memmap(
+        images_path, mode="w+", dtype=np.uint8, shape=(len(samples), 3, img_size, img_size))
+    paths = [path for path, _ in dataset.samples]
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for index, image in enumerate(executor.map(lambda p: _load_resized(p, img_size), paths)):
+            images[index] = image
+    images.flush()
+    del images
+
+    # Ghi meta sau cùng: cache dở dang (bị ngắt giữa chừng) sẽ được build lại
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return images_path, np.array(dataset.targets), dataset.classes
+
+
+class CachedImageDataset(Dataset):
+    """
+    Đọc ảnh đã resize từ cache memmap, augmentation chạy trên tensor uint8.
+
+    Memmap được mở lười trong từng worker để không phải pickle cả mảng.
+    """
+
+    def __init__(self, images_path, targets, indices, transform):
+        self.images_path = images_path
+        self.targets = targets
+        self.indices = indices
+        self.transform = transform
+        self._images = None
+
+    def __getstate__(self):
+        # Worker (spawn trên Windows) tự mở lại memmap
+        state = self.__dict__.copy()
+        state["_images"] = None
+        return state
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        if self._images is None:
+            self._images = np.load(self.images_path, mmap_mode="r")
+        sample = self.indices[index]
+        image = torch.from_numpy(np.array(self._images[sample]))
+        return self.transform(image), int(self.targets[sample])
+
+
+def make_loader(dataset, batch_size, shuffle, num_workers=0, prefetch_factor=2,
+                pin_memory=False, persistent_workers=True):
+    options = {}
+    if num_workers > 0:
+        options = {"prefetch_factor": prefetch_factor,
+                   "persistent_workers": persistent_workers}
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle,
+                      num_workers=num_workers, pin_memory=pin_memory, **options)
+
+
+def get_datasets(data_dir, train_transform, val_transform, cache_dir=None, img_size=None):
+    """
+    Tạo tập train/val từ một lần quét DATA_DIR.
+
+    Nếu có cache_dir, ảnh được đọc từ cache memmap và transform phải nhận
+    tensor uint8 (xem utils.transforms.get_*_tensor_transform).
+    """
+    if cache_dir:
+        images_path, targets, _ = build_image_cache(data_dir, cache_dir, img_size)
+        train_idx, val_idx = split_indices(targets.tolist())
+        return (CachedImageDataset(images_path, targets, train_idx, train_transform),
+                CachedImageDataset(images_path, targets, val_idx, val_transform))
+
+    dataset = ImageFolder(root=data_dir)
+    train_idx, val_idx = split_indices(dataset.targets)
+    return (TransformSubset(dataset, train_idx, train_transform),
+            TransformSubset(dataset, val_idx, val_transform))
@@ -1,3 +1,4 @@
+import torch
 from torchvision import transforms
 
 def get_train_transform(img_size):
@@ -20,3 +21,25 @@ def get_val_transform(img_size):
         transforms.Normalize(mean=[0.485, 0.456, 0.406],
                              std=[0.229, 0.224, 0.225])
     ])
+
+
+# Các transform dưới đây nhận tensor uint8 (3, H, W) đã resize sẵn từ cache,
+# nên bỏ qua bước Resize/ToTensor và chỉ đổi sang float ở cuối
+def get_train_tensor_transform(img_size):
+    return transforms.Compose([
+        transforms.RandomHorizontalFlip(p=0.5),
+        transforms.RandomRotation(15),
+        transforms.ColorJitter(brightness=0.2, contrast=0.2, saturation=0.2, hue=0.1),
+        transforms.RandomResizedCrop(img_size, scale=(0.8, 1.0), antialias=True),
+        transforms.ConvertImageDtype(torch.float32),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                             std=[0.229, 0.224, 0.225])
+    ])
+
+
+def get_val_tensor_transform():
+    return transforms.Compose([
+        transforms.ConvertImageDtype(torch.float32),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                             std=[0.229, 0.224, 0.225])
+    ])
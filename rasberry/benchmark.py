@@ -0,0 +1,238 @@
+"""
+Đo độ trễ và thông lượng của từng bước suy luận trên Pi.
+
+Các bước được đo:
+    decode    giải mã JPEG/PNG từ bộ nhớ (cv2.imdecode)
+    preprocess  resize + chuẩn hóa theo backend
+    forward   chạy mô hình với batch 1..N
+    e2e       chụp (khung hình giả) -> phân loại -> mã hóa JPEG -> gửi lên server giả
+
+Mỗi tổ hợp backend x số luồng chạy trong một process riêng và cho ra
+p50/p95/p99 (ms) và thông lượng (ảnh/s), lưu thành JSON để so sánh giữa các
+lần chạy.
+
+Ví dụ:
+    python benchmark.py --backend tflite --backend onnx --threads 1 --threads 4 \\
+        --output bench_pi4.json --baseline bench_pi4_old.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import requests
+
+import model_inference
+import send_to_server
+from check_parity import parse_backend
+from export_tflite import IMAGE_EXTENSIONS
+
+DEFAULT_IMAGE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'model', 'MobileNet-v3', 'test')
+
+
+def load_images(image_dir):
+    # Đọc sẵn bytes của ảnh để phép đo decode không bị ảnh hưởng bởi I/O đĩa
+    paths = sorted(
+        os.path.join(image_dir, name) for name in os.listdir(image_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS))
+    if not paths:
+        raise SystemExit(f"Không tìm thấy ảnh trong {image_dir}")
+    images = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            images.append(np.frombuffer(f.read(), dtype=np.uint8))
+    return paths, images
+
+
+def summarize(timings_ms, items_per_call=1):
+    timings = np.asarray(timings_ms)
+    return {
+        'runs': int(timings.size),
+        'mean_ms': float(timings.mean()),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'throughput_per_s': float(items_per_call * 1000 / timings.mean()),
+    }
+
+
+def time_calls(func, inputs, iterations, warmup):
+    # Lặp vòng qua các đầu vào; vài lần chạy đầu chỉ để khởi động (cache, JIT, ...)
+    for i in range(warmup):
+        func(inputs[i % len(inputs)])
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(inputs[i % len(inputs)])
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Giả lập endpoint bulk của Django: đọc hết body rồi trả 201."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps({'results': [{'status': 'created'}]}).encode()
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/waste-records/bulk/"
+
+
+def bench_backend(backend, frames, args, endpoint, session):
+    resized = [cv2.resize(frame, model_inference.IMG_SIZE, interpolation=cv2.INTER_AREA)
+               for frame in frames]
+    results = {}
+
+    def preprocess(frame):
+        rgb = cv2.resize(frame, model_inference.IMG_SIZE, interpolation=cv2.INTER_AREA)[..., ::-1]
+        return backend.preprocess(rgb)
+
+    results['preprocess'] = summarize(time_calls(
+        preprocess, frames, args.iterations, args.warmup))
+
+    # Ghép batch từ các ảnh mẫu (lặp lại nếu batch lớn hơn số ảnh)
+    samples = [backend.preprocess(image[..., ::-1]).copy() for image in resized]
+    results['forward'] = {}
+    for batch_size in args.batch_sizes:
+        batch = np.concatenate([samples[i % len(samples)] for i in range(batch_size)])
+        results['forward'][str(batch_size)] = summarize(time_calls(
+            backend.predict, [batch], args.iterations, args.warmup), batch_size)
+
+    def end_to_end(frame):
+        # "Chụp" là sao chép khung hình như capture_array trả về một mảng mới
+        captured = frame.copy()
+        pred_class, confidence = model_inference.predict_frame(captured, backend)
+        ret, buffer = cv2.imencode('.jpg', captured, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
+        detection_result = send_to_server.make_detection_result(pred_class, confidence)
+        if send_to_server.send_batch_to_server(
+                [(detection_result, buffer.tobytes())], session=session, endpoint=endpoint) is None:
+            raise RuntimeError("Server giả không phản hồi")
+
+    results['e2e'] = summarize(time_calls(end_to_end, frames, args.iterations, args.warmup))
+    return results
+
+
+def bench_in_process(name, path, threads, frames, args, endpoint):
+    backend = model_inference.load_backend(name, path, threads)
+    with requests.Session() as session:
+        return bench_backend(backend, frames, args, endpoint, session)
+
+
+def bench_isolated(name, path, threads, frames, args, endpoint):
+    # Mỗi tổ hợp backend x số luồng chạy trong process riêng: TensorFlow chỉ cho
+    # đặt số luồng một lần mỗi process, và các lần đo không ảnh hưởng lẫn nhau
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(bench_in_process, name, path, threads, frames, args, endpoint).result()
+
+
+def compare(results, baseline, max_regression):
+    """In thay đổi p50 so với lần chạy trước, trả về True nếu có bước chậm hơn ngưỡng."""
+    previous = {(run['backend'], run['threads']): run for run in baseline['runs']}
+    failed = False
+    for run in results['runs']:
+        old = previous.get((run['backend'], run['threads']))
+        if old is None:
+            continue
+        pairs = [('decode', run['decode'], old['decode']),
+                 ('preprocess', run['preprocess'], old['preprocess']),
+                 ('e2e', run['e2e'], old['e2e'])]
+        pairs += [(f"forward[{size}]", stats, old['forward'][size])
+                  for size, stats in run['forward'].items() if size in old['forward']]
+        for stage, new_stats, old_stats in pairs:
+            change = new_stats['p50_ms'] / old_stats['p50_ms'] - 1
+            status = "FAIL" if change > max_regression else "OK"
+            failed |= status == "FAIL"
+            print(f"{run['backend']} threads={run['threads']} {stage}: "
+                  f"{old_stats['p50_ms']:.2f} -> {new_stats['p50_ms']:.2f} ms "
+                  f"({change:+.1%}) [{status}]")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--image-dir', default=DEFAULT_IMAGE_DIR)
+    parser.add_argument('--backend', action='append',
+                        help='tên[:đường_dẫn], có thể lặp lại (mặc định INFERENCE_BACKEND)')
+    parser.add_argument('--threads', type=int, action='append',
+                        help='Số luồng suy luận, có thể lặp lại')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='File JSON của lần chạy trước để so sánh')
+    parser.add_argument('--max-regression', type=float, default=0.10,
+                        help='Mức tăng p50 tối đa cho phép so với baseline (0.10 = 10%%)')
+    args = parser.parse_args()
+
+    paths, encoded = load_images(args.image_dir)
+    frames = [cv2.imdecode(data, cv2.IMREAD_COLOR) for data in encoded]
+    decode = summarize(time_calls(
+        lambda data: cv2.imdecode(data, cv2.IMREAD_COLOR), encoded, args.iterations, args.warmup))
+
+    server, endpoint = start_stub_server()
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'platform': platform.platform(),
+            'processor': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+        },
+        'images': [os.path.basename(path) for path in paths],
+        'iterations': args.iterations,
+        'runs': [],
+    }
+    try:
+        for spec, name, path in map(parse_backend, args.backend or [model_inference.BACKEND]):
+            for threads in args.threads or [model_inference.NUM_THREADS]:
+                print(f"Đang đo {spec} với {threads} luồng...")
+                run = {'backend': spec, 'threads': threads, 'decode': decode}
+                run.update(bench_isolated(name, path, threads, frames, args, endpoint))
+                results['runs'].append(run)
+
+                print(f"  decode     p50={run['decode']['p50_ms']:.2f} ms")
+                print(f"  preprocess p50={run['preprocess']['p50_ms']:.2f} ms")
+                for size, stats in run['forward'].items():
+                    print(f"  forward[{size}] p50={stats['p50_ms']:.2f} ms "
+                          f"p99={stats['p99_ms']:.2f} ms {stats['throughput_per_s']:.1f} ảnh/s")
+                print(f"  e2e        p50={run['e2e']['p50_ms']:.2f} ms "
+                      f"p99={run['e2e']['p99_ms']:.2f} ms")
+    finally:
+        server.shutdown()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Đã lưu kết quả: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        raise SystemExit(1 if compare(results, baseline, args.max_regression) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,36 @@
-from camera_stream import picam2, frame_lock
+from camera_stream import picam2, frame_lock, hub
+import cv2
 import time
 
 def capture_image(output_path="rubbish.jpg"):
     with frame_lock:
         picam2.capture_file(output_path)
+
+def capture_frame(timeout=1.0):
+    # Lấy khung hình mới từ frame hub của livestream (mảng BGR chỉ đọc, không
+    # ghi ra đĩa); chỉ chụp trực tiếp khi hub chưa chạy
+    if hub.running:
+        latest = hub.latest()
+        frame = hub.wait_for_frame(latest.seq if latest else 0, timeout)
+        if frame is not None:
+            return frame.array
+    with frame_lock:
+        return picam2.capture_array("main")
+
+def capture_stable_frame(max_wait=2.0, threshold=4.0, stable_frames=3, min_wait=0.2):
+    # Chụp ngay khi rác nằm yên trên livestream thay vì chờ cố định max_wait
+    # giây; trả về (khung hình, đã ổn định hay chưa)
+    if hub.running:
+        frame, stable = hub.wait_until_stable(threshold, stable_frames, min_wait, max_wait)
+        # Hub dừng giữa chừng thì khung hình cuối có thể đã cũ, chụp trực tiếp
+        if frame is not None and hub.running:
+            return frame.array, stable
+    time.sleep(max_wait)
+    return capture_frame(), False
+
+def encode_jpeg(frame, quality=90):
+    # Mã hóa JPEG một lần duy nhất để gửi lên server
+    ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not ret:
+        raise RuntimeError("Không mã hóa được ảnh JPEG")
+    return buffer.tobytes()
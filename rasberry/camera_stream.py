@@ -1,45 +1,77 @@
-from flask import Flask, Response
-from picamera2 import Picamera2
+from flask import Flask, Response, abort, jsonify, request
+import os
 import threading
-import time
-import io
-import cv2  # dùng OpenCV để encode ảnh JPEG
+
+from frame_hub import BOUNDARY, FakeCamera, FrameHub
 
 app = Flask(__name__)
 
+# CAMERA_SOURCE=fake để chạy livestream với khung hình giả khi không có Pi camera
+CAMERA_SOURCE = os.environ.get("CAMERA_SOURCE", "picamera")
+
 # Khởi tạo camera
-picam2 = Picamera2()
+if CAMERA_SOURCE == "fake":
+    picam2 = FakeCamera()
+else:
+    from picamera2 import Picamera2
+    picam2 = Picamera2()
+
+    # Cấu hình camera tối ưu
+    video_config = picam2.create_video_configuration(
+        main={"size": (640, 480), "format": "RGB888"},  # RGB888 nhanh hơn XBGR8888
+        controls={"FrameDurationLimits": (10000, 33333)}  # ~30 FPS
+    )
+    picam2.configure(video_config)
+    picam2.start()
+
 frame_lock = threading.Lock()
 
-# Cấu hình camera tối ưu
-video_config = picam2.create_video_configuration(
-    main={"size": (640, 480), "format": "RGB888"},  # RGB888 nhanh hơn XBGR8888
-    controls={"FrameDurationLimits": (10000, 33333)}  # ~30 FPS
-)
-picam2.configure(video_config)
-picam2.start()
-
-def generate_frames():
-    while True:
-        with frame_lock:
-            frame = picam2.capture_array("main")
-        
-        # Encode ảnh sang JPEG với chất lượng 70 để giảm kích thước
-        ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
-        if not ret:
-            continue
-        frame_bytes = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        
-        # Delay nhỏ để giảm tải CPU (~30 fps)
-        time.sleep(0.03)
+# Một thread duy nhất chụp + mã hóa JPEG (chất lượng 70), dùng chung cho mọi người xem;
+# khi đang phân loại (hub.throttle()) giảm còn 5 FPS để nhường CPU cho mô hình
+hub = FrameHub(lambda: picam2.capture_array("main"), fps=30, quality=70, lock=frame_lock,
+               busy_fps=5)
+
+def int_param(name, low, high):
+    # Tham số tùy chọn trên URL, ví dụ /video_feed?width=320&quality=50&fps=10
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        abort(400, f"{name} phải là số nguyên")
+    return min(max(value, low), high)
+
+def generate_frames(width=None, quality=None, fps=None):
+    return hub.stream(width=width, quality=quality, fps=fps)
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(generate_frames(),
-                    mimetype='multipart/x-mixed-replace; boundary=frame')
+    # Không truyền width/quality thì chất lượng tự điều chỉnh theo tốc độ mạng
+    return Response(generate_frames(width=int_param('width', 160, 1920),
+                                    quality=int_param('quality', 10, 95),
+                                    fps=int_param('fps', 1, hub.fps)),
+                    mimetype='multipart/x-mixed-replace; boundary=' + BOUNDARY.decode())
+
+@app.route('/snapshot')
+def snapshot():
+    # Khung hình mới nhất, dùng lại bản JPEG đã mã hóa cho livestream nếu có
+    jpeg = hub.snapshot(width=int_param('width', 160, 1920),
+                        quality=int_param('quality', 10, 95))
+    if jpeg is None:
+        abort(503, "Camera chưa sẵn sàng")
+    return Response(bytes(jpeg), mimetype='image/jpeg',
+                    headers={'Cache-Control': 'no-store'})
+
+# main.py cập nhật khi mô hình đã warm-up và đã gửi BEGIN cho Arduino
+status = {"ready": False}
+
+@app.route('/health')
+def health():
+    # 200 khi hệ thống sẵn sàng phân loại, 503 trong lúc đang khởi động
+    return jsonify(status), 200 if status["ready"] else 503
 
 def start_stream():
-    # Chạy Flask server để hiển thị livestream
-    app.run(host="0.0.0.0", port=5000)
+    hub.start()
+    # Chạy Flask server để hiển thị livestream (mỗi người xem một thread)
+    app.run(host="0.0.0.0", port=5000, threaded=True)
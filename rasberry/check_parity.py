@@ -0,0 +1,83 @@
+"""
+Kiểm tra độ chính xác của các backend suy luận trên tập validation.
+
+Tập dữ liệu có dạng mỗi lớp một thư mục con (glass/, metal/, paper/, plastic/).
+Backend đầu tiên được dùng làm chuẩn để đo tỉ lệ dự đoán trùng khớp.
+
+Ví dụ:
+    python check_parity.py --data-dir data/val \\
+        --backend keras --backend tflite:outputs/checkpoints/best_model_98_int8.tflite
+"""
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+import model_inference
+from export_tflite import IMAGE_EXTENSIONS
+
+
+def load_dataset(data_dir, limit=None):
+    samples = []
+    for label, name in enumerate(model_inference.categories):
+        class_dir = os.path.join(data_dir, name)
+        if not os.path.isdir(class_dir):
+            continue
+        for filename in sorted(os.listdir(class_dir)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((os.path.join(class_dir, filename), label))
+    return samples[:limit] if limit else samples
+
+
+def parse_backend(spec):
+    # "tên" hoặc "tên:đường_dẫn_mô_hình"
+    name, _, path = spec.partition(':')
+    return spec, name, path or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', required=True)
+    parser.add_argument('--backend', action='append', required=True,
+                        help='tên[:đường_dẫn], có thể lặp lại')
+    parser.add_argument('--threads', type=int, default=model_inference.NUM_THREADS)
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--max-drop', type=float, default=0.01,
+                        help='Độ chính xác tối đa được phép giảm so với backend chuẩn')
+    args = parser.parse_args()
+
+    samples = load_dataset(args.data_dir, args.limit)
+    if not samples:
+        raise SystemExit(f"Không tìm thấy ảnh trong {args.data_dir}")
+    frames = [cv2.imread(path) for path, _ in samples]
+    labels = np.array([label for _, label in samples])
+
+    predictions = {}
+    for spec, name, path in map(parse_backend, args.backend):
+        backend = model_inference.load_backend(name, path, args.threads)
+        start = time.perf_counter()
+        predictions[spec] = np.array([
+            model_inference.predict_frame(frame, backend)[0] for frame in frames
+        ])
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(frames)
+        accuracy = float((predictions[spec] == labels).mean())
+        print(f"{spec}: accuracy={accuracy:.4f} latency={elapsed_ms:.1f} ms/ảnh")
+
+    reference = args.backend[0]
+    reference_accuracy = float((predictions[reference] == labels).mean())
+    failed = False
+    for spec in args.backend[1:]:
+        agreement = float((predictions[spec] == predictions[reference]).mean())
+        drop = reference_accuracy - float((predictions[spec] == labels).mean())
+        status = "OK" if drop <= args.max_drop else "FAIL"
+        failed |= status == "FAIL"
+        print(f"{spec} so với {reference}: trùng khớp={agreement:.4f} "
+              f"giảm độ chính xác={drop:+.4f} [{status}]")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Xuất mô hình Keras sang TFLite: fp32, float16 và int8 (lượng tử hóa toàn phần).
+
+Ví dụ:
+    python export_tflite.py --calib-dir data/val --quantize all
+"""
+import argparse
+import os
+import random
+
+import cv2
+import numpy as np
+
+import model_inference
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_images(root):
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(dirpath, filename))
+    return sorted(paths)
+
+
+def load_rgb(path):
+    frame = cv2.imread(path)
+    resized = cv2.resize(frame, model_inference.IMG_SIZE, interpolation=cv2.INTER_AREA)
+    return resized[..., ::-1].astype(np.float32)
+
+
+def representative_dataset(calib_dir, samples):
+    # Tập hiệu chuẩn cho int8: ảnh thật, cùng tiền xử lý với lúc suy luận
+    paths = list_images(calib_dir)
+    random.Random(0).shuffle(paths)
+
+    def generator():
+        for path in paths[:samples]:
+            yield [load_rgb(path)[np.newaxis]]
+
+    return generator
+
+
+def convert(keras_model, quantize, calib_dir=None, samples=100):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    if quantize == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == 'int8':
+        if not calib_dir:
+            raise SystemExit("int8 cần --calib-dir để hiệu chuẩn")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(calib_dir, samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--keras-model', default=model_inference.MODEL_PATHS['keras'])
+    parser.add_argument('--output-dir', default='outputs/checkpoints')
+    parser.add_argument('--quantize', choices=['none', 'float16', 'int8', 'all'], default='all')
+    parser.add_argument('--calib-dir', help='Thư mục ảnh (mỗi lớp một thư mục con) cho int8')
+    parser.add_argument('--calib-samples', type=int, default=100)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    keras_model = tf.keras.models.load_model(args.keras_model)
+
+    variants = ['none', 'float16', 'int8'] if args.quantize == 'all' else [args.quantize]
+    if 'int8' in variants and not args.calib_dir and args.quantize == 'all':
+        print("[INFO] Bỏ qua int8 vì không có --calib-dir")
+        variants.remove('int8')
+
+    base = os.path.splitext(os.path.basename(args.keras_model))[0]
+    os.makedirs(args.output_dir, exist_ok=True)
+    for variant in variants:
+        tflite_model = convert(keras_model, variant, args.calib_dir, args.calib_samples)
+        suffix = '' if variant == 'none' else f'_{variant}'
+        path = os.path.join(args.output_dir, f'{base}{suffix}.tflite')
+        with open(path, 'wb') as f:
+            f.write(tflite_model)
+        print(f"Đã xuất {path} ({len(tflite_model) / 1e6:.2f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+"""
+Bộ phân phối khung hình dùng chung cho livestream MJPEG.
+
+Một thread duy nhất chụp khung hình theo nhịp FPS, mã hóa JPEG một lần và
+đặt vào ring buffer; mọi người xem dùng chung đúng một đối tượng bytes cho
+mỗi khung hình. Người xem chậm chỉ nhận khung hình mới nhất (các khung hình
+cũ bị bỏ qua), nên không làm chậm thread chụp hay người xem khác.
+
+Chạy thử không cần camera:
+    python frame_hub.py --viewers 5 --seconds 5
+"""
+import argparse
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+BOUNDARY = b'frame'
+
+
+class Frame:
+    """
+    Một khung hình đã chụp (array chỉ đọc) cùng các bản MJPEG đã mã hóa.
+
+    Mỗi biến thể (chiều rộng, chất lượng) chỉ được mã hóa một lần cho mỗi
+    khung hình, dù có bao nhiêu người xem cùng yêu cầu.
+    """
+
+    __slots__ = ('seq', 'timestamp', 'array', 'parts', '_lock')
+
+    def __init__(self, seq, timestamp, array):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.array = array
+        self.parts = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, width=None, quality=70):
+        """Phần MJPEG (boundary + header + JPEG) của biến thể, mã hóa nếu chưa có."""
+        if width and width >= self.array.shape[1]:
+            width = None
+        key = (width, quality)
+        part = self.parts.get(key)
+        if part is None:
+            with self._lock:
+                part = self.parts.get(key)
+                if part is None:
+                    image = self.array
+                    if width:
+                        height = round(image.shape[0] * width / image.shape[1])
+                        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+                    ret, buffer = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+                    if not ret:
+                        raise RuntimeError("Không mã hóa được ảnh JPEG")
+                    part = mjpeg_part(buffer.tobytes())
+                    self.parts[key] = part
+        return part
+
+    def jpeg(self, width=None, quality=70):
+        # Không sao chép: cắt bỏ header/boundary trên memoryview
+        part = self.encoded(width, quality)
+        start = part.index(b'\r\n\r\n') + 4
+        return memoryview(part)[start:-2]
+
+
+def mjpeg_part(jpeg_bytes):
+    return (b'--' + BOUNDARY + b'\r\nContent-Type: image/jpeg\r\nContent-Length: ' +
+            str(len(jpeg_bytes)).encode() + b'\r\n\r\n' + jpeg_bytes + b'\r\n')
+
+
+def downscale(array, width=80):
+    # Lấy mẫu thưa kênh xanh lá: đủ để phát hiện chuyển động, gần như không tốn CPU
+    step = max(1, array.shape[1] // width)
+    return array[::step, ::step, 1].astype(np.int16)
+
+
+def frame_difference(a, b):
+    """Độ lệch trung bình (0..255) giữa hai khung hình đã downscale."""
+    return float(np.abs(a - b).mean())
+
+
+class FakeCamera:
+    """Nguồn khung hình giả (dải màu chạy ngang) để phát triển/kiểm thử không cần Pi."""
+
+    def __init__(self, size=(640, 480)):
+        self.size = size
+        self.count = 0
+        width, height = size
+        self._base = np.tile(np.linspace(0, 255, width, dtype=np.uint8), (height, 1))
+
+    def capture_array(self, name='main'):
+        self.count += 1
+        shift = (self.count * 8) % self.size[0]
+        channel = np.roll(self._base, shift, axis=1)
+        frame = np.dstack([channel, np.flipud(channel), np.full_like(channel, self.count % 256)])
+        cv2.putText(frame, str(self.count), (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        return frame
+
+    def capture_file(self, output_path):
+        cv2.imwrite(output_path, self.capture_array())
+
+
+# Các mức chất lượng tự động (chiều rộng, chất lượng JPEG); None = độ phân giải gốc
+QUALITY_LEVELS = [(None, 70), (480, 60), (320, 50)]
+
+
+class FrameHub:
+    """
+    capture: hàm trả về khung hình BGR (ví dụ lambda: picam2.capture_array("main")).
+    lock: khóa dùng chung với các chỗ khác gọi trực tiếp vào camera.
+    busy_fps: FPS khi đang suy luận (xem throttle()), để nhường CPU cho mô hình.
+    """
+
+    def __init__(self, capture, fps=30, quality=70, buffer_size=4, lock=None, busy_fps=5):
+        self.capture = capture
+        self.fps = fps
+        self.quality = quality
+        self.busy_fps = busy_fps
+        self.lock = lock or threading.Lock()
+        self._busy = 0
+
+        self._frames = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._subscribers = 0
+
+        # Thống kê để theo dõi tải
+        self.captured = 0
+        self.encoded = 0
+
+    # --- Producer ---------------------------------------------------------
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='frame-hub', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    @contextmanager
+    def throttle(self):
+        """Giảm FPS (và số lần mã hóa) trong lúc bộ phân loại đang chạy trên cùng CPU."""
+        with self._condition:
+            self._busy += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._busy -= 1
+
+    @property
+    def busy(self):
+        return self._busy > 0
+
+    def _run(self):
+        next_due = time.monotonic()
+        seq = 0
+        while not self._stop.is_set():
+            # Giữ nhịp theo mốc thời gian thay vì sleep cố định sau mỗi khung hình
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            interval = 1.0 / (self.busy_fps if self.busy else self.fps)
+            next_due = max(next_due + interval, time.monotonic())
+
+            try:
+                with self.lock:
+                    array = self.capture()
+            except Exception as e:
+                print(f"Lỗi chụp khung hình: {e}")
+                self._stop.wait(0.5)
+                continue
+            array.flags.writeable = False
+            self.captured += 1
+
+            seq += 1
+            frame = Frame(seq, time.time(), array)
+            # Mã hóa sẵn bản mặc định khi có người xem (dùng chung cho tất cả);
+            # các biến thể khác được mã hóa một lần bởi người xem đầu tiên cần đến
+            if self._subscribers and not self.busy:
+                self._encode(frame, None, self.quality)
+            with self._condition:
+                self._frames.append(frame)
+                self._condition.notify_all()
+
+    def _encode(self, frame, width, quality):
+        before = len(frame.parts)
+        part = frame.encoded(width, quality)
+        if len(frame.parts) != before:
+            self.encoded += 1
+        return part
+
+    # --- Consumers --------------------------------------------------------
+
+    def latest(self):
+        """Khung hình mới nhất (hoặc None nếu chưa có)."""
+        with self._condition:
+            return self._frames[-1] if self._frames else None
+
+    def wait_for_frame(self, after_seq=0, timeout=None):
+        """Chờ khung hình có seq > after_seq, trả về khung hình mới nhất."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._stop.is_set():
+                if self._frames and self._frames[-1].seq > after_seq:
+                    return self._frames[-1]
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+        return None
+
+    def wait_until_stable(self, threshold=4.0, stable_frames=3, min_wait=0.2, max_wait=2.0):
+        """
+        Chờ rác rơi vào khung hình rồi nằm yên.
+
+        Khung hình lúc gọi hàm là mốc: chỉ chấp nhận khi đã thấy chuyển động
+        (hai khung hình liên tiếp lệch >= threshold) hoặc cảnh đã khác mốc, để
+        cảnh trống đứng yên trước khi rác rơi xuống không bị coi là ổn định.
+        Sau đó cần stable_frames cặp khung hình liên tiếp lệch dưới threshold.
+        Trả về (khung hình, True) khi ổn định, hoặc (khung hình mới nhất, False)
+        khi hết max_wait giây hay hub đã dừng.
+        """
+        started = time.monotonic()
+        deadline = started + max_wait
+        latest = self.latest()
+        seq = latest.seq if latest else 0
+        reference = downscale(latest.array) if latest else None
+        previous = None
+        arrived = False
+        stable = 0
+        frame = None
+        while self.running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            next_frame = self.wait_for_frame(seq, timeout=remaining)
+            if next_frame is None:
+                continue
+            frame, seq = next_frame, next_frame.seq
+            small = downscale(frame.array)
+            if reference is None:
+                reference = small
+            moving = previous is not None and frame_difference(previous, small) >= threshold
+            stable = 0 if moving or previous is None else stable + 1
+            arrived = arrived or moving or frame_difference(reference, small) >= threshold
+            previous = small
+            if arrived and stable >= stable_frames and time.monotonic() - started >= min_wait:
+                return frame, True
+        return frame or self.latest(), False
+
+    def snapshot(self, width=None, quality=None):
+        """JPEG (memoryview) của khung hình mới nhất, dùng lại bản đã mã hóa nếu có."""
+        frame = self.latest()
+        if frame is None:
+            return None
+        self._encode(frame, width, quality or self.quality)
+        return frame.jpeg(width, quality or self.quality)
+
+    def stream(self, width=None, quality=None, fps=None, stats=None):
+        """
+        Generator trả về các phần MJPEG cho một người xem.
+
+        width/quality/fps: giới hạn riêng của người xem. Nếu không chỉ định
+        width và quality, chất lượng tự điều chỉnh theo QUALITY_LEVELS: hạ
+        một mức khi người xem gửi chậm hơn nhịp khung hình, nâng lại khi mạng
+        ổn định. Người xem chậm bỏ qua các khung hình cũ và luôn nhận khung
+        hình mới nhất; số khung hình bị bỏ được cộng vào stats['dropped'].
+        """
+        stats = stats if stats is not None else {}
+        stats.setdefault('sent', 0)
+        stats.setdefault('dropped', 0)
+        adaptive = width is None and quality is None
+        level = 0
+        slow_frames = fast_frames = 0
+        min_interval = 1.0 / fps if fps else 0.0
+
+        with self._condition:
+            self._subscribers += 1
+        try:
+            last_seq = 0
+            next_due = 0.0
+            while not self._stop.is_set():
+                frame = self.wait_for_frame(last_seq, timeout=1.0)
+                if frame is None:
+                    continue
+                # Giới hạn FPS riêng theo mốc thời gian của khung hình
+                if frame.timestamp < next_due:
+                    last_seq = frame.seq
+                    continue
+                next_due = max(next_due + min_interval, frame.timestamp)
+
+                if adaptive:
+                    width, quality = QUALITY_LEVELS[level]
+                part = self._encode(frame, width, quality or self.quality)
+                if last_seq and not min_interval:
+                    stats['dropped'] += frame.seq - last_seq - 1
+                last_seq = frame.seq
+
+                started = time.monotonic()
+                yield part
+                stats['sent'] += 1
+
+                if adaptive:
+                    # Thời gian ghi xong một khung hình so với nhịp của người xem
+                    frame_interval = max(min_interval, 1.0 / self.fps)
+                    elapsed = time.monotonic() - started
+                    if elapsed > 1.5 * frame_interval:
+                        slow_frames, fast_frames = slow_frames + 1, 0
+                    elif elapsed < 0.5 * frame_interval:
+                        slow_frames, fast_frames = 0, fast_frames + 1
+                    if slow_frames >= 5 and level < len(QUALITY_LEVELS) - 1:
+                        level, slow_frames = level + 1, 0
+                    elif fast_frames >= 60 and level > 0:
+                        level, fast_frames = level - 1, 0
+                    stats['level'] = level
+        finally:
+            with self._condition:
+                self._subscribers -= 1
+
+    @property
+    def running(self):
+        return self._thread is not None and not self._stop.is_set()
+
+    @property
+    def subscriber_count(self):
+        with self._condition:
+            return self._subscribers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--viewers', type=int, default=3)
+    parser.add_argument('--slow-viewers', type=int, default=1,
+                        help='Số người xem giả lập mạng chậm (5 khung hình/giây)')
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    hub = FrameHub(FakeCamera().capture_array, fps=args.fps).start()
+    results = []
+
+    def viewer(delay):
+        stats = {}
+        results.append((delay, stats))
+        deadline = time.monotonic() + args.seconds
+        for _ in hub.stream(stats=stats):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(delay)
+
+    threads = [threading.Thread(target=viewer, args=(0.2 if i < args.slow_viewers else 0,))
+               for i in range(args.viewers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    hub.stop()
+
+    print(f"Đã chụp {hub.captured} khung hình, mã hóa {hub.encoded} lần "
+          f"cho {args.viewers} người xem")
+    for delay, stats in results:
+        kind = 'chậm' if delay else 'nhanh'
+        print(f"  người xem {kind}: nhận {stats['sent']}, bỏ qua {stats['dropped']}, "
+              f"mức chất lượng {QUALITY_LEVELS[stats.get('level', 0)]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,47 +1,119 @@
+import time
+STARTED = time.monotonic()
+
 import threading
-import camera_stream  # import module vừa tạo
+from concurrent.futures import ThreadPoolExecutor
+
+import model_inference
+
+# Load + warm-up mô hình song song với khởi tạo camera và serial
+startup = {}
+model_loader = ThreadPoolExecutor(max_workers=1)
+model_future = model_loader.submit(model_inference.preload)
+
+phase = time.monotonic()
+import camera_stream  # import module vừa tạo (khởi tạo camera)
 
 # Khởi động camera live stream ở thread khác
 stream_thread = threading.Thread(target=camera_stream.start_stream, daemon=True)
 stream_thread.start()
+startup['camera'] = time.monotonic() - phase
 
 
 import serial
-import time
 import camera
-import model_inference
 import send_to_server
+from pipeline import Job, Pipeline
+from upload_queue import UploadQueue
+
+# Chờ rác nằm yên trên livestream tối đa SETTLE_MAX_WAIT giây rồi mới chụp
+SETTLE_MAX_WAIT = 2
+# In bảng thời gian từng giai đoạn sau mỗi N lần phân loại
+REPORT_EVERY = 10
 
-# Kết nối serial với Arduino
-ser = serial.Serial('/dev/ttyUSB0', 9600)
-time.sleep(2)
+# Hàng đợi gửi dữ liệu chạy nền, không để vòng phân loại chờ mạng
+upload_queue = UploadQueue()
+upload_queue.start()
+
+# Kết nối serial với Arduino; readline chờ tối đa 1 giây thay vì vòng lặp bận
+phase = time.monotonic()
+ser = serial.Serial('/dev/ttyUSB0', 9600, timeout=1)
+time.sleep(2)  # Arduino tự reset khi mở cổng serial
 ser.reset_input_buffer()  # Xóa bộ đệm đầu vào
+startup['serial'] = time.monotonic() - phase
+
+class_names = model_inference.categories
+
+
+def capture(job):
+    job.frame, stable = camera.capture_stable_frame(max_wait=SETTLE_MAX_WAIT)
+    if not stable:
+        print("[WARN] Khung hình chưa ổn định sau", SETTLE_MAX_WAIT, "giây, vẫn dùng khung hình mới nhất")
+    return job
+
+
+def classify(job):
+    # Livestream tạm giảm FPS để mô hình được ưu tiên CPU
+    with camera_stream.hub.throttle():
+        job.prediction, job.confidence = model_inference.predict_frame(job.frame)
+    return job
+
+
+def reply(job):
+    print("Loại rác:", class_names[job.prediction])
+    ser.write((class_names[job.prediction] + '\n').encode())  # Gửi lại kết quả cho Arduino
+    job.timings['cycle'] = job.elapsed
+    return job
+
+
+def upload(job):
+    detection_result = send_to_server.make_detection_result(job.prediction, job.confidence)
+    upload_queue.enqueue(detection_result, camera.encode_jpeg(job.frame))
+    job.frame = None
+    return job
+
+
+def done(job):
+    timings = " ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in job.timings.items())
+    print(f"[TIMING] #{job.id} {timings}")
+    if job.id % REPORT_EVERY == 0:
+        print("[TIMING] Thống kê theo giai đoạn:")
+        print(pipeline.report())
+
+
+# serial -> chụp -> suy luận -> trả lời Arduino -> đưa vào hàng đợi gửi
+pipeline = Pipeline([
+    ('capture', capture),
+    ('inference', classify),
+    ('reply', reply),
+    ('upload', upload),
+], maxsize=2, on_done=done)
+pipeline.start()
+
+# Chỉ báo BEGIN khi mô hình đã load và warm-up xong (lỗi load mô hình dừng chương trình tại đây)
+startup.update(model_future.result())
+model_loader.shutdown()
+startup['total'] = time.monotonic() - STARTED
+
+camera_stream.status.update(ready=True, startup_seconds=round(startup['total'], 3))
 
 # Gửi tín hiệu BEGIN cho Arduino (chỉ 1 lần)
 ser.write(b"BEGIN\n")
 print("[INFO] Đã gửi 'BEGIN' cho Arduino.")
+phases = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in startup.items() if name != 'total')
+print(f"[INFO] Khởi động xong sau {startup['total']:.2f} s ({phases})")
 
-class_names = ['glass', 'metal', 'paper', 'plastic']
-
-while True:
-    if ser.in_waiting:
-        line = ser.readline().decode().strip()
+try:
+    while True:
+        line = ser.readline().decode(errors='ignore').strip()
         if line == "DETECT":
             print("Rác được phát hiện. Đang chụp ảnh...")
-            try:
-                time.sleep(2)
-                camera.capture_image()
-                predict, confidence = model_inference.predict_image("rubbish.jpg")
-                confidentce = round(confidence * 100, 2)  # Làm tròn đến 2 chữ số thập phân
-                print("Loại rác:", class_names[predict])
-                ser.write((class_names[predict] + '\n').encode())  # Gửi lại kết quả cho Arduino
-                detection_result = {
-                    'type_id': predict+1,
-                    'confidence': confidence
-                }
-                success = send_to_server.send_to_server(detection_result, "rubbish.jpg")
-                if not success:
-                    print("[WARNING] Gửi dữ liệu lên server thất bại, nhưng hệ thống vẫn tiếp tục hoạt động.")
-            except Exception as e:
-                print("Lỗi:", e)
-
+            # Chặn ở đây nếu pipeline đang đầy, dữ liệu serial vẫn nằm trong bộ đệm
+            pipeline.submit(Job(line))
+except KeyboardInterrupt:
+    pass
+finally:
+    pipeline.stop()
+    upload_queue.stop()
+    print("[TIMING] Thống kê theo giai đoạn:")
+    print(pipeline.report())
@@ -1,31 +1,177 @@
-import tensorflow as tf
-import numpy as np
-from tensorflow.keras.applications.mobilenet_v3 import preprocess_input
-from tensorflow.keras.preprocessing import image
-import matplotlib.pyplot as plt
+import os
+import threading
+import time
 
-# Load mô hình đã huấn luyện
-model = tf.keras.models.load_model("outputs/checkpoints/best_model_98.keras")
+import numpy as np
+import cv2
 
 # Kích thước ảnh và nhãn
 IMG_SIZE = (224, 224)
 categories = ['glass', 'metal', 'paper', 'plastic']
 
-def predict_image(img_path):
-    # Load và resize ảnh
-    img = image.load_img(img_path, target_size=IMG_SIZE)
-    img_array = image.img_to_array(img)
+# Chọn backend suy luận qua biến môi trường: keras | tflite | onnx
+BACKEND = os.environ.get("INFERENCE_BACKEND", "keras")
+NUM_THREADS = int(os.environ.get("INFERENCE_THREADS", "4"))
+MODEL_PATHS = {
+    "keras": "outputs/checkpoints/best_model_98.keras",
+    "tflite": "outputs/checkpoints/best_model_98.tflite",
+    # ONNX xuất từ checkpoint PyTorch (model/MobileNet-v3)
+    "onnx": "outputs/checkpoints/best_model.onnx",
+}
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class KerasBackend:
+    """Mô hình Keras gốc (MobileNetV3 có sẵn lớp rescaling, đầu vào 0..255 NHWC)."""
+
+    def __init__(self, model_path, num_threads=None):
+        import tensorflow as tf
+        if num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+        self.model = tf.keras.models.load_model(model_path)
+        self.input_batch = np.empty((1, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32)
+
+    def preprocess(self, rgb):
+        np.copyto(self.input_batch[0], rgb, casting='unsafe')
+        return self.input_batch
+
+    def predict(self, batch):
+        # Gọi trực tiếp model(...) thay vì model.predict để tránh chi phí dispatch
+        return np.asarray(self.model(batch, training=False))
+
+
+class TFLiteBackend:
+    """TFLite (fp32 / float16 / int8), dùng tflite_runtime nếu có để khởi động nhẹ."""
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self.input_batch = np.empty(self.input_detail['shape'], dtype=self.input_detail['dtype'])
+
+    def preprocess(self, rgb):
+        scale, zero_point = self.input_detail['quantization']
+        if self.input_batch.dtype == np.float32:
+            np.copyto(self.input_batch[0], rgb, casting='unsafe')
+        else:
+            # Mô hình int8 lượng tử hóa cả đầu vào
+            quantized = np.round(rgb.astype(np.float32) / scale + zero_point)
+            info = np.iinfo(self.input_batch.dtype)
+            np.copyto(self.input_batch[0], np.clip(quantized, info.min, info.max),
+                      casting='unsafe')
+        return self.input_batch
+
+    def predict(self, batch):
+        if batch.shape[0] != self.input_detail['shape'][0]:
+            # Đổi kích thước batch (chủ yếu dùng khi benchmark với batch > 1)
+            self.interpreter.resize_tensor_input(self.input_detail['index'], batch.shape)
+            self.interpreter.allocate_tensors()
+            self.input_detail = self.interpreter.get_input_details()[0]
+            self.output_detail = self.interpreter.get_output_details()[0]
+        self.interpreter.set_tensor(self.input_detail['index'], batch)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_detail['index'])
+        if output.dtype != np.float32:
+            scale, zero_point = self.output_detail['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class OnnxBackend:
+    """ONNX Runtime cho mô hình PyTorch (chuẩn hóa ImageNet, NCHW, đầu ra logits)."""
 
-    # Cast và chuẩn hóa theo MobileNetV3
-    img_array = tf.cast(img_array, tf.float32)
-    img_array = preprocess_input(img_array)
+    def __init__(self, model_path, num_threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_batch = np.empty((1, 3, IMG_SIZE[1], IMG_SIZE[0]), dtype=np.float32)
 
-    # Thêm batch dimension
-    img_batch = tf.expand_dims(img_array, axis=0)
+    def preprocess(self, rgb):
+        normalized = (rgb.astype(np.float32) / 255.0 - IMAGENET_MEAN) / IMAGENET_STD
+        np.copyto(self.input_batch[0], normalized.transpose(2, 0, 1))
+        return self.input_batch
 
-    # Dự đoán
-    preds = model.predict(img_batch)
+    def predict(self, batch):
+        logits = self.session.run(None, {self.input_name: batch})[0]
+        return softmax(logits)
+
+
+BACKENDS = {
+    "keras": KerasBackend,
+    "tflite": TFLiteBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def load_backend(name=BACKEND, model_path=None, num_threads=NUM_THREADS):
+    if name not in BACKENDS:
+        raise ValueError(f"Backend không hợp lệ: {name} (chọn {', '.join(BACKENDS)})")
+    return BACKENDS[name](model_path or MODEL_PATHS[name], num_threads)
+
+
+# Mô hình chỉ được load khi cần (get_model/preload), import module không tốn thời gian
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_backend()
+    return _model
+
+
+def warm_up(backend=None):
+    """
+    Chạy thử một khung hình đen để lần phân loại thật đầu tiên không phải trả
+    chi phí khởi tạo (Keras trace graph, TFLite/ONNX cấp phát bộ nhớ).
+    """
+    dummy = np.zeros((IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.uint8)
+    started = time.monotonic()
+    predict_frame(dummy, backend)
+    return time.monotonic() - started
+
+
+def preload():
+    """Load mô hình mặc định và warm-up; trả về thời gian (giây) của từng bước."""
+    started = time.monotonic()
+    backend = get_model()
+    loaded = time.monotonic() - started
+    return {'model_load': loaded, 'warm_up': warm_up(backend)}
+
+
+def predict_frame(frame, backend=None):
+    """Dự đoán từ khung hình BGR uint8 của camera, không qua file trung gian."""
+    backend = backend or get_model()
+    resized = cv2.resize(frame, IMG_SIZE, interpolation=cv2.INTER_AREA)
+    preds = backend.predict(backend.preprocess(resized[..., ::-1]))
     pred_class = np.argmax(preds[0])
     confidence = np.max(preds[0])
 
     return pred_class, confidence
+
+
+def predict_image(img_path, backend=None):
+    # Load ảnh từ file (BGR) rồi dùng chung đường xử lý với camera
+    frame = cv2.imread(img_path)
+    if frame is None:
+        raise FileNotFoundError(img_path)
+    return predict_frame(frame, backend)
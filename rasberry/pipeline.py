@@ -0,0 +1,155 @@
+"""
+Pipeline nhiều giai đoạn chạy song song cho vòng phân loại trên Pi.
+
+Mỗi giai đoạn là một thread đọc job từ hàng đợi vào, xử lý rồi đẩy sang
+hàng đợi kế tiếp. Hàng đợi có giới hạn nên khi một giai đoạn phía sau bị
+chậm, các giai đoạn phía trước sẽ phải chờ thay vì dồn việc không giới hạn.
+Mỗi giai đoạn ghi lại thời gian chờ trong hàng đợi và thời gian xử lý.
+"""
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+STOP = object()
+
+
+class Job:
+    """Một lần phát hiện rác đi qua pipeline."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, trigger):
+        self.id = next(self._ids)
+        self.trigger = trigger
+        self.created = time.monotonic()
+        self.timings = {}
+        self.frame = None
+        self.prediction = None
+        self.confidence = None
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.created
+
+
+class StageStats:
+    """Thống kê thời gian chờ + xử lý của một giai đoạn (giữ window mẫu gần nhất)."""
+
+    def __init__(self, window=200):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.wait = deque(maxlen=window)
+        self.work = deque(maxlen=window)
+
+    def record(self, wait, work):
+        with self._lock:
+            self.count += 1
+            self.wait.append(wait)
+            self.work.append(work)
+
+    def summary(self):
+        with self._lock:
+            if not self.work:
+                return None
+            work = np.array(self.work) * 1000
+            wait = np.array(self.wait) * 1000
+            return {
+                'count': self.count,
+                'errors': self.errors,
+                'work_p50_ms': float(np.percentile(work, 50)),
+                'work_p95_ms': float(np.percentile(work, 95)),
+                'wait_p50_ms': float(np.percentile(wait, 50)),
+            }
+
+
+class Stage:
+    """
+    func(job) trả về job (đẩy sang giai đoạn sau) hoặc None (bỏ job).
+    Lỗi trong func chỉ làm hỏng job hiện tại, thread vẫn tiếp tục chạy.
+    """
+
+    def __init__(self, name, func, inbox, outbox=None, on_done=None):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.on_done = on_done
+        self.stats = StageStats()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _run(self):
+        while True:
+            item = self.inbox.get()
+            if item is STOP:
+                if self.outbox is not None:
+                    self.outbox.put(STOP)
+                return
+            job, queued_at = item
+            started = time.monotonic()
+            try:
+                job = self.func(job)
+            except Exception as e:
+                self.stats.errors += 1
+                print(f"[{self.name}] Lỗi: {e}")
+                continue
+            finished = time.monotonic()
+            self.stats.record(started - queued_at, finished - started)
+            if job is None:
+                continue
+            job.timings[self.name] = finished - started
+            if self.outbox is not None:
+                self.outbox.put((job, finished))
+            elif self.on_done is not None:
+                self.on_done(job)
+
+
+class Pipeline:
+    """
+    Nối các giai đoạn [(tên, hàm), ...] bằng hàng đợi có giới hạn maxsize.
+    on_done(job) được gọi khi job đi hết giai đoạn cuối.
+    """
+
+    def __init__(self, stages, maxsize=2, on_done=None):
+        self.inbox = queue.Queue(maxsize=maxsize)
+        self.stages = []
+        inbox = self.inbox
+        for index, (name, func) in enumerate(stages):
+            last = index == len(stages) - 1
+            outbox = None if last else queue.Queue(maxsize=maxsize)
+            self.stages.append(Stage(name, func, inbox, outbox, on_done if last else None))
+            inbox = outbox
+
+    def start(self):
+        for stage in self.stages:
+            stage.thread.start()
+        return self
+
+    def submit(self, job, block=True, timeout=None):
+        """Đưa job vào giai đoạn đầu; trả về False nếu hàng đợi đầy."""
+        try:
+            self.inbox.put((job, time.monotonic()), block=block, timeout=timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def stop(self, timeout=5):
+        self.inbox.put(STOP)
+        for stage in self.stages:
+            stage.thread.join(timeout)
+
+    def report(self):
+        lines = []
+        for stage in self.stages:
+            summary = stage.stats.summary()
+            if summary is None:
+                continue
+            lines.append(
+                f"  {stage.name:<10} n={summary['count']:<5} lỗi={summary['errors']:<3} "
+                f"xử lý p50={summary['work_p50_ms']:.1f} ms p95={summary['work_p95_ms']:.1f} ms "
+                f"chờ p50={summary['wait_p50_ms']:.1f} ms")
+        return "\n".join(lines)
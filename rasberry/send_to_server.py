@@ -1,6 +1,15 @@
+import json
 import requests
 
 API_ENDPOINT = "http://172.20.10.2:8000/api/waste-records/"
+BULK_API_ENDPOINT = API_ENDPOINT + "bulk/"
+
+def make_detection_result(pred_class, confidence):
+    # Server lưu độ tin cậy theo phần trăm (0..100), mô hình trả về 0..1
+    return {
+        'type_id': int(pred_class) + 1,
+        'confidence': round(float(confidence) * 100, 2)
+    }
 
 def send_to_server(detection_result, image_path):
     try:
@@ -38,3 +47,41 @@ def send_to_server(detection_result, image_path):
     except Exception as e:
         print(f"🔥 Lỗi không xác định: {e}")
         return False
+
+
+def send_batch_to_server(detections, session=None, timeout=30, endpoint=None):
+    """
+    Gửi nhiều kết quả cùng lúc qua endpoint bulk.
+
+    detections: list các tuple (detection_result, image_bytes).
+    Trả về danh sách kết quả từng phần tử từ server, hoặc None nếu lỗi mạng.
+    """
+    records = []
+    files = {}
+    for index, (detection_result, image_bytes) in enumerate(detections):
+        field = f"image{index}"
+        record = {
+            'type_id': detection_result['type_id'],
+            'confidence': detection_result['confidence'],
+            'image': field
+        }
+        if 'idempotency_key' in detection_result:
+            record['idempotency_key'] = detection_result['idempotency_key']
+        records.append(record)
+        files[field] = (f'{field}.jpg', image_bytes, 'image/jpeg')
+
+    try:
+        response = (session or requests).post(
+            endpoint or BULK_API_ENDPOINT,
+            data={'records': json.dumps(records)},
+            files=files,
+            timeout=timeout
+        )
+        if response.status_code in (201, 207):
+            return response.json()['results']
+        print(f"Lỗi: Mã trạng thái {response.status_code}")
+        print(f"Nội dung phản hồi: {response.text}")
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"🌐 Lỗi khi gửi dữ liệu: {e}")
+        return None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Các module của Pi nằm phẳng trong rasberry/ và import lẫn nhau theo tên
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,205 @@
+import threading
+import time
+
+import numpy as np
+
+from frame_hub import QUALITY_LEVELS, FakeCamera, FrameHub
+
+
+def watch(hub, seconds, delay=0.0, **kwargs):
+    """Một người xem đọc stream trong `seconds` giây, nghỉ `delay` giây sau mỗi khung hình."""
+    stats = {'parts': []}
+    deadline = time.monotonic() + seconds
+    stream = hub.stream(stats=stats, **kwargs)
+    for part in stream:
+        stats['parts'].append(part)
+        if time.monotonic() > deadline:
+            break
+        time.sleep(delay)
+    stream.close()
+    return stats
+
+
+def watch_all(hub, seconds, delays, **kwargs):
+    results = [None] * len(delays)
+
+    def run(index, delay):
+        results[index] = watch(hub, seconds, delay, **kwargs)
+
+    threads = [threading.Thread(target=run, args=(i, delay)) for i, delay in enumerate(delays)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_frames_are_encoded_once_for_all_viewers():
+    hub = FrameHub(FakeCamera().capture_array, fps=30).start()
+    try:
+        results = watch_all(hub, 1.0, [0.0] * 5, quality=70)
+    finally:
+        hub.stop()
+
+    assert hub.encoded <= hub.captured
+    assert sum(stats['sent'] for stats in results) > 2 * hub.captured
+    # Mọi người xem nhận đúng cùng một đối tượng bytes cho cùng một khung hình
+    shared = {id(part) for stats in results for part in stats['parts']}
+    assert len(shared) <= hub.encoded
+
+
+def test_slow_viewer_drops_frames_without_slowing_others():
+    hub = FrameHub(FakeCamera().capture_array, fps=30).start()
+    try:
+        fast, slow = watch_all(hub, 1.5, [0.0, 0.2], quality=70)
+    finally:
+        hub.stop()
+
+    assert slow['dropped'] > 10
+    assert slow['sent'] < fast['sent'] / 3
+    assert fast['dropped'] <= 3
+    assert hub.captured >= 0.8 * 30 * 1.5
+
+
+def test_slow_viewer_lowers_adaptive_quality():
+    hub = FrameHub(FakeCamera().capture_array, fps=30).start()
+    try:
+        stats = watch(hub, 2.0, delay=0.2)
+    finally:
+        hub.stop()
+
+    assert stats['level'] == len(QUALITY_LEVELS) - 1
+
+
+def test_viewer_fps_limit():
+    hub = FrameHub(FakeCamera().capture_array, fps=30).start()
+    try:
+        stats = watch(hub, 1.0, fps=5, quality=70)
+    finally:
+        hub.stop()
+
+    assert 4 <= stats['sent'] <= 7
+
+
+def test_deadline_pacing_keeps_rate_with_slow_capture():
+    camera = FakeCamera()
+
+    def slow_capture():
+        time.sleep(0.02)
+        return camera.capture_array()
+
+    # Ngủ cố định 50 ms sau mỗi lần chụp 20 ms chỉ được ~14 khung hình/giây
+    hub = FrameHub(slow_capture, fps=20).start()
+    time.sleep(1.0)
+    hub.stop()
+
+    assert 18 <= hub.captured <= 22
+
+
+def test_throttle_lowers_capture_rate():
+    hub = FrameHub(FakeCamera().capture_array, fps=30, busy_fps=5).start()
+    try:
+        with hub.throttle():
+            time.sleep(0.1)
+            before = hub.captured
+            time.sleep(1.0)
+            throttled = hub.captured - before
+        assert not hub.busy
+    finally:
+        hub.stop()
+
+    assert 4 <= throttled <= 7
+
+
+def test_snapshot_returns_jpeg_of_latest_frame():
+    hub = FrameHub(FakeCamera().capture_array, fps=30)
+    assert hub.snapshot() is None
+
+    hub.start()
+    try:
+        assert hub.wait_for_frame(timeout=1.0) is not None
+        jpeg = hub.snapshot(width=320)
+    finally:
+        hub.stop()
+
+    assert bytes(jpeg[:2]) == b'\xff\xd8' and bytes(jpeg[-2:]) == b'\xff\xd9'
+    assert isinstance(hub.latest().array, np.ndarray)
+
+
+class Scene:
+    """
+    Cảnh giả cho wait_until_stable: nền tĩnh có nhiễu cảm biến, vật thể xuất
+    hiện lúc `arrive` giây rồi trượt ngang tới lúc `settle` giây mới nằm yên.
+    """
+
+    def __init__(self, arrive=None, settle=None):
+        self.arrive = arrive
+        self.settle = settle
+        self.rng = np.random.default_rng(0)
+        self.started = time.monotonic()
+
+    def capture(self):
+        elapsed = time.monotonic() - self.started
+        frame = np.full((480, 640, 3), 90, dtype=np.int16)
+        if self.arrive is not None and elapsed >= self.arrive:
+            x = int((min(elapsed, self.settle) - self.arrive) * 800)
+            frame[200:300, x:x + 100] = 220
+        frame += self.rng.integers(-3, 4, frame.shape, dtype=np.int16)
+        return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def has_item(frame):
+    return frame.array[250, :, 1].max() > 200
+
+
+def test_wait_until_stable_fires_after_item_settles():
+    scene = Scene(arrive=0.4, settle=0.7)
+    hub = FrameHub(scene.capture, fps=30).start()
+    try:
+        hub.wait_for_frame(timeout=1.0)
+        frame, stable = hub.wait_until_stable(max_wait=3.0)
+        elapsed = time.monotonic() - scene.started
+    finally:
+        hub.stop()
+
+    # Cảnh trống đứng yên trước khi vật thể rơi vào không được coi là ổn định
+    assert stable and has_item(frame)
+    assert 0.7 <= elapsed < 1.2
+
+
+def test_wait_until_stable_needs_a_change_from_the_trigger_frame():
+    hub = FrameHub(Scene().capture, fps=30).start()
+    try:
+        hub.wait_for_frame(timeout=1.0)
+        started = time.monotonic()
+        frame, stable = hub.wait_until_stable(max_wait=0.6)
+    finally:
+        hub.stop()
+
+    assert not stable and frame is not None
+    assert time.monotonic() - started >= 0.6
+
+
+def test_wait_until_stable_gives_up_on_continuous_motion():
+    hub = FrameHub(FakeCamera().capture_array, fps=30).start()
+    try:
+        started = time.monotonic()
+        frame, stable = hub.wait_until_stable(max_wait=0.5)
+        elapsed = time.monotonic() - started
+    finally:
+        hub.stop()
+
+    assert not stable and frame is not None
+    assert 0.5 <= elapsed < 0.7
+
+
+def test_wait_until_stable_returns_when_hub_stops():
+    hub = FrameHub(Scene().capture, fps=30).start()
+    hub.wait_for_frame(timeout=1.0)
+    threading.Timer(0.2, hub.stop).start()
+
+    started = time.monotonic()
+    frame, stable = hub.wait_until_stable(max_wait=5.0)
+
+    assert not stable
+    assert time.monotonic() - started < 0.5
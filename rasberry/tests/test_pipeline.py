@@ -0,0 +1,107 @@
+import threading
+import time
+
+from pipeline import Job, Pipeline, StageStats
+
+
+def sleep_stage(seconds):
+    def stage(job):
+        time.sleep(seconds)
+        return job
+    return stage
+
+
+def test_jobs_pass_through_all_stages_in_order():
+    done = []
+    seen = []
+
+    def record(name):
+        def stage(job):
+            seen.append((job.id, name))
+            return job
+        return stage
+
+    pipeline = Pipeline([('a', record('a')), ('b', record('b'))], on_done=done.append).start()
+    jobs = [Job('DETECT') for _ in range(5)]
+    for job in jobs:
+        assert pipeline.submit(job)
+    pipeline.stop()
+
+    assert [job.id for job in done] == [job.id for job in jobs]
+    assert set(done[0].timings) == {'a', 'b'}
+    for job in jobs:
+        assert seen.index((job.id, 'a')) < seen.index((job.id, 'b'))
+
+
+def test_stages_overlap():
+    done = []
+    pipeline = Pipeline([('a', sleep_stage(0.1)), ('b', sleep_stage(0.1))],
+                        on_done=done.append).start()
+    started = time.monotonic()
+    for _ in range(4):
+        pipeline.submit(Job('DETECT'))
+    pipeline.stop()
+
+    # Nối tiếp sẽ mất 0.8 s; chạy song song chỉ ~0.5 s
+    assert len(done) == 4
+    assert time.monotonic() - started < 0.7
+
+
+def test_full_queues_apply_backpressure():
+    release = threading.Event()
+
+    def blocked(job):
+        release.wait(5)
+        return job
+
+    pipeline = Pipeline([('a', blocked)], maxsize=1).start()
+    assert pipeline.submit(Job('DETECT'))          # đang xử lý ở giai đoạn a
+    assert pipeline.submit(Job('DETECT'))          # nằm trong hàng đợi
+    assert not pipeline.submit(Job('DETECT'), block=False)
+    assert not pipeline.submit(Job('DETECT'), timeout=0.05)
+
+    release.set()
+    pipeline.stop()
+
+
+def test_failed_job_is_counted_and_pipeline_keeps_running():
+    done = []
+
+    def flaky(job):
+        if job.id % 2:
+            raise ValueError("lỗi giả")
+        return job
+
+    pipeline = Pipeline([('flaky', flaky), ('b', lambda job: job)], on_done=done.append).start()
+    jobs = [Job('DETECT') for _ in range(4)]
+    for job in jobs:
+        pipeline.submit(job)
+    pipeline.stop()
+
+    assert [job.id for job in done] == [job.id for job in jobs if job.id % 2 == 0]
+    flaky_stats = pipeline.stages[0].stats
+    assert flaky_stats.errors == 2 and flaky_stats.count == 2
+    assert 'lỗi=2' in pipeline.report()
+
+
+def test_stage_returning_none_drops_job():
+    done = []
+    pipeline = Pipeline([('drop', lambda job: None), ('b', lambda job: job)],
+                        on_done=done.append).start()
+    pipeline.submit(Job('DETECT'))
+    pipeline.stop()
+
+    assert done == []
+    assert pipeline.stages[1].stats.summary() is None
+
+
+def test_stage_stats_summary():
+    stats = StageStats(window=3)
+    for work in (0.010, 0.020, 0.030, 0.040):
+        stats.record(0.001, work)
+
+    summary = stats.summary()
+    assert summary['count'] == 4
+    # Chỉ giữ 3 mẫu gần nhất
+    assert abs(summary['work_p50_ms'] - 30.0) < 1e-6
+    assert abs(summary['wait_p50_ms'] - 1.0) < 1e-6
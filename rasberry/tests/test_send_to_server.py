@@ -0,0 +1,11 @@
+import numpy as np
+
+from send_to_server import make_detection_result
+
+
+def test_detection_result_sends_confidence_as_percentage():
+    result = make_detection_result(np.int64(2), np.float32(0.87654))
+
+    assert result == {'type_id': 3, 'confidence': 87.65}
+    assert type(result['type_id']) is int
+    assert type(result['confidence']) is float
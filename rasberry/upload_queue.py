@@ -0,0 +1,141 @@
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import send_to_server
+
+# Hàng đợi gửi dữ liệu lưu trên đĩa (SQLite): vòng lặp chính chỉ cần ghi vào
+# hàng đợi rồi tiếp tục phân loại, thread nền sẽ gửi lên server khi có mạng.
+# Mỗi bản ghi có idempotency key riêng nên gửi lại nhiều lần cũng không bị
+# trùng trên server (at-least-once).
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    type_id INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    image BLOB NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+class UploadQueue:
+    def __init__(self, db_path="outbox.sqlite3", batch_size=20,
+                 base_backoff=1.0, max_backoff=300.0):
+        self.batch_size = batch_size
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+        # Dùng chung kết nối HTTP (keep-alive) cho mọi lần gửi
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+    def enqueue(self, detection_result, image_bytes):
+        """Ghi một kết quả vào hàng đợi và trả về ngay (không chờ mạng)."""
+        key = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO outbox (idempotency_key, type_id, confidence, image, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, int(detection_result['type_id']),
+                 float(detection_result['confidence']),
+                 sqlite3.Binary(image_bytes), time.time()),
+            )
+            self._db.commit()
+        self._wake.set()
+        return key
+
+    def pending_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _next_batch(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, idempotency_key, type_id, confidence, image "
+                "FROM outbox ORDER BY id LIMIT ?",
+                (self.batch_size,),
+            ).fetchall()
+
+    def _delete(self, row_ids):
+        with self._lock:
+            self._db.executemany("DELETE FROM outbox WHERE id = ?",
+                                 [(row_id,) for row_id in row_ids])
+            self._db.commit()
+
+    def drain_once(self):
+        """
+        Gửi một lô. Trả về True nếu lô được server xác nhận, False nếu lỗi
+        mạng/server (giữ nguyên trong hàng đợi để gửi lại), None nếu rỗng.
+        """
+        rows = self._next_batch()
+        if not rows:
+            return None
+
+        detections = [
+            ({'type_id': type_id, 'confidence': confidence, 'idempotency_key': key},
+             bytes(image))
+            for _, key, type_id, confidence, image in rows
+        ]
+        results = send_to_server.send_batch_to_server(detections, session=self.session)
+        if results is None:
+            return False
+
+        # Bản ghi "invalid" không bao giờ gửi thành công được nên cũng bỏ đi
+        for (_, key, _, _, _), result in zip(rows, results):
+            if result['status'] == 'invalid':
+                print(f"[WARNING] Server từ chối bản ghi {key}: {result['errors']}")
+        self._delete([row[0] for row in rows])
+        return True
+
+    def _backoff_delay(self):
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (self.failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.drain_once()
+            except Exception as e:
+                print(f"🔥 Lỗi hàng đợi gửi dữ liệu: {e}")
+                sent = False
+
+            if sent:
+                self.failures = 0
+                continue  # Còn dữ liệu thì gửi tiếp ngay
+            if sent is False:
+                self.failures += 1
+                self._stop.wait(self._backoff_delay())
+            else:
+                # Hàng đợi rỗng: ngủ tới khi có dữ liệu mới
+                self._wake.wait()
+                self._wake.clear()